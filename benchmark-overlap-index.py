@@ -0,0 +1,51 @@
+##############################################################################################################################################################################
+# This script compares the overlap check with the spatial cell index (pfemp1/spatial_index.py) to the linear scan over all placed points for N = 10, 100, 1000 and 10000
+# molecules. N discs are placed on a half-sphere of radius R_AA with a disc radius chosen such that they cover the same fraction of the surface for every N.
+# Timings are given per placed knob (placement of all N discs) and per single overlap query against N stored points.
+##############################################################################################################################################################################
+
+import time
+
+import numpy as np
+
+from pfemp1.geometry import unit_vectors, overlap_cos
+from pfemp1.placement import uniform_in_sector_batch, uniform_in_sector_indexed
+from pfemp1.spatial_index import SphereCellIndex
+
+R_AA=79.206/2.0
+coverage=0.1 #fraction of the half-sphere covered by the discs
+
+#run f repeatedly for at least min_time seconds and return the mean time per call
+def timeit(f,min_time=0.5):
+	calls=0
+	start=time.time()
+	while True:
+		f()
+		calls+=1
+		elapsed=time.time()-start
+		if elapsed>min_time:
+			return elapsed/calls
+
+#print the timings of both overlap checks for every N
+def main():
+	rng=np.random.default_rng(0)
+	print("%6s %10s %16s %16s %16s %16s" % ("N","r_thresh","linear knob (s)","index knob (s)","linear query (s)","index query (s)"))
+	for N in [10,100,1000,10000]:
+		r_thresh=np.sqrt(coverage*2.0*np.power(R_AA,2)/N)
+
+		linear_knob=timeit(lambda: uniform_in_sector_batch(np.pi/2.0,0.0,N,R_AA,r_thresh,[],rng))
+		index_knob=timeit(lambda: uniform_in_sector_indexed(np.pi/2.0,0.0,N,R_AA,r_thresh,SphereCellIndex(R_AA,2*r_thresh),rng))
+
+		#single queries against a knob that is already filled with N points
+		index=SphereCellIndex(R_AA,2*r_thresh)
+		angles=uniform_in_sector_indexed(np.pi/2.0,0.0,N,R_AA,r_thresh,index,rng)
+		stored=unit_vectors(angles[0],angles[1])
+		limit=overlap_cos(R_AA,2*r_thresh)
+		u=unit_vectors(0.3,1.0)
+		linear_query=timeit(lambda: np.all(np.abs(stored@u)<=limit))
+		index_query=timeit(lambda: index.is_free(u))
+
+		print("%6d %10.3f %16.6f %16.6f %16.2e %16.2e" % (N,r_thresh,linear_knob,index_knob,linear_query,index_query))
+
+if __name__=="__main__":
+	main()
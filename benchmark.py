@@ -0,0 +1,164 @@
+##############################################################################################################################################################################
+# Benchmark of the placement and nearest neighbor pipeline: generate_sample, the loop and batch placement in a ring section (uniform_in_sector,
+# uniform_in_sector_batch), the nearest neighbor stage and routine_AA (pfemp1/average_distance.py) end to end are timed for a grid of molecule counts, disc radii r_thresh
+# and knob radii R. The throughput (calls per second, knobs per second for routine_AA) is written to benchmark-results.json.
+#     python benchmark.py save       stores the results as baseline (benchmark-baseline.json)
+#     python benchmark.py            compares to the baseline and exits with status 1 if a throughput dropped by more than threshold (cases that fail are timed
+#                                    a second time before)
+#     python benchmark.py compare 0.5    the same with another threshold
+# The speed of a shared machine drifts by tens of percent within seconds, which is far more than most regressions. Every timing of a case is therefore followed by
+# a timing of a fixed reference workload (small NumPy calls in a Python loop, like the placement), and the comparison uses the relative throughput, the calls of
+# the case per run of the reference (median over repeats pairs of timings). The throughput in calls per second is reported as well.
+# Reliability: in three comparisons of unchanged code on a busy shared machine the relative throughputs differed from the baseline by at most 25% (the throughputs
+# in calls per second by up to 67%). The default threshold of 35% gave no false alarm there, but it only catches large regressions; on an idle machine a lower
+# threshold can be passed.
+# Timings depend on the machine, so a baseline should only be compared on the machine it was recorded on (the platform is stored with it).
+##############################################################################################################################################################################
+
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from pfemp1 import kernels
+from pfemp1.knob import generate_sample, uniform_in_sector, r_var, R_AA, R_AS, thetas_AA, percentage_in_each_section_AA
+from pfemp1.placement import uniform_in_sector_batch
+from pfemp1.neighbours import nearest_neighbour_distances
+from pfemp1.geometry import unit_vectors
+from pfemp1.storage import DistanceWriter
+from pfemp1.average_distance import routine_AA
+
+baseline_path="benchmark-baseline.json"
+results_path="benchmark-results.json"
+threshold=0.35 #largest accepted relative drop of the throughput
+repeats=9 #the median of these timings is used, after one calibration timing
+min_time=0.1 #seconds per timing
+reference_calls=200 #calls of reference_work per reference timing
+
+molecule_counts=[2,5,10]
+radii_thresh=[r_var/2.0,r_var]
+radii_knob=[R_AA,R_AS]
+routine_knobs=500 #knobs per end-to-end run (one chunk)
+
+#fixed work that is timed next to every case: small NumPy calls in a Python loop
+def reference_work(rng):
+	x=rng.random(64)
+	total=0.0
+	for i in range(16):
+		total+=float(np.dot(x,x[::-1]))
+	return total
+
+#seconds for the given number of calls of f(rng), starting with the same seed every time, so the random work is the same in all timings and in all runs
+def timing(f,calls):
+	rng=np.random.default_rng(0)
+	start=time.perf_counter()
+	for j in range(calls):
+		f(rng)
+	return time.perf_counter()-start
+
+#calls per second of f(rng) and calls per run of reference_work. The first timing determines how many calls take at least min_time seconds, then the same calls
+#are timed repeats times, each time followed by a timing of the reference work; the medians of the timings and of the ratios are used.
+def throughput(f):
+	rng=np.random.default_rng(0)
+	calls=0
+	start=time.perf_counter()
+	while time.perf_counter()-start<min_time:
+		f(rng)
+		calls+=1
+	timings=[]
+	ratios=[]
+	for i in range(repeats):
+		t=timing(f,calls)
+		timings.append(t)
+		ratios.append(t/(timing(reference_work,reference_calls)/reference_calls))
+	return calls/np.median(timings),calls/np.median(ratios)
+
+#throughput of all cases, or only of the cases whose keys are selected
+def run(selected=None):
+	rng=np.random.default_rng(0)
+	results={}
+	relative={}
+	def measure(key,f,scale=1):
+		if selected is None or key in selected:
+			per_second,per_reference=throughput(f)
+			results[key]=scale*per_second
+			relative[key]=scale*per_reference
+
+	for molecules in molecule_counts:
+		measure('generate_sample molecules=%d' % molecules,lambda rng: generate_sample(molecules,percentage_in_each_section_AA,rng))
+
+	#one ring section (the outer ring of the AA knob) of a knob of radius R
+	empty=np.zeros((2,0))
+	for R in radii_knob:
+		for r_thresh in radii_thresh:
+			for molecules in molecule_counts:
+				key='molecules=%d r_thresh=%.3f R=%.3f' % (molecules,r_thresh,R)
+				measure('uniform_in_sector '+key,lambda rng: uniform_in_sector(thetas_AA[4],thetas_AA[5],molecules,R,r_thresh,empty,rng))
+				measure('uniform_in_sector_batch '+key,lambda rng: uniform_in_sector_batch(thetas_AA[4],thetas_AA[5],molecules,R,r_thresh,empty,rng))
+
+	for R in radii_knob:
+		for molecules in molecule_counts:
+			points=R*unit_vectors(np.pi/2.0*rng.random(molecules),2*np.pi*rng.random(molecules))
+			measure('nearest_neighbours molecules=%d R=%.3f' % (molecules,R),lambda rng: nearest_neighbour_distances(points,R))
+
+	with tempfile.TemporaryDirectory() as directory:
+		with DistanceWriter(os.path.join(directory,'benchmark.bin'),append=False) as writer:
+			for r_thresh in radii_thresh:
+				for molecules in molecule_counts:
+					measure('routine_AA molecules=%d r_thresh=%.3f' % (molecules,r_thresh),lambda rng: routine_AA(routine_knobs,molecules,r_thresh,writer),routine_knobs)
+	return results,relative
+
+def environment():
+	return {'python':platform.python_version(),'numpy':np.__version__,'platform':platform.platform(),'processor':platform.processor(),'backend':kernels.active()}
+
+#keys whose relative throughput dropped by more than threshold compared to the baseline, with the relative change
+def regressions(relative,baseline,threshold=threshold):
+	changes={}
+	for key,value in relative.items():
+		if key in baseline and value<(1.0-threshold)*baseline[key]:
+			changes[key]=value/baseline[key]-1.0
+	return changes
+
+#mode 'save' records the baseline, mode 'compare' compares to it; returns the exit status (1 if a case regressed by more than threshold)
+def main(mode='compare',threshold=threshold):
+	results,relative=run()
+	if mode=='save':
+		with open(baseline_path,'w') as f:
+			json.dump({'environment':environment(),'throughput':results,'relative':relative},f,indent=1,sort_keys=True)
+		print("baseline written to %s" % baseline_path)
+		return 0
+
+	with open(baseline_path) as f:
+		baseline=json.load(f)
+	if 'relative' not in baseline:
+		print("the baseline %s has no relative throughputs, record it again with: python benchmark.py save" % baseline_path)
+		return 2
+	if baseline['environment']!=environment():
+		print("warning: the baseline was recorded in a different environment: %s" % baseline['environment'])
+	#the cases that seem to have regressed are timed once more and the better result is kept
+	changes=regressions(relative,baseline['relative'],threshold)
+	if changes:
+		again,again_relative=run(set(changes))
+		for key in again:
+			if again_relative[key]>relative[key]:
+				results[key]=again[key]
+				relative[key]=again_relative[key]
+		changes=regressions(relative,baseline['relative'],threshold)
+	print("%-60s %14s %14s %8s %8s" % ("case","baseline (1/s)","current (1/s)","change","relative"))
+	for key,value in sorted(results.items()):
+		if key in baseline['relative']:
+			print("%-60s %14.1f %14.1f %+7.1f%% %+7.1f%%" % (key,baseline['throughput'][key],value,100.0*(value/baseline['throughput'][key]-1.0),
+				100.0*(relative[key]/baseline['relative'][key]-1.0)))
+	with open(results_path,'w') as f:
+		json.dump({'environment':environment(),'throughput':results,'relative':relative},f,indent=1,sort_keys=True)
+	if changes:
+		print("relative throughput regression beyond %d%%: %s" % (100*threshold,', '.join(sorted(changes))))
+		return 1
+	return 0
+
+if __name__=="__main__":
+	sys.exit(main(sys.argv[1] if len(sys.argv)>1 else 'compare',float(sys.argv[2]) if len(sys.argv)>2 else threshold))
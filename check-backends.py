@@ -0,0 +1,42 @@
+##############################################################################################################################################################################
+# This script checks that the numba and the NumPy backend of pfemp1/kernels.py give the same nearest neighbor distances: the original loop placement of the AA knob
+# is run with both backends and the same seed for several molecule counts and the full arrays of distances are compared; the exit status is 1 on a mismatch. It
+# also prints the time per knob for both backends. Without numba there is only one backend and the check is skipped (exit status 0).
+##############################################################################################################################################################################
+
+import sys
+import time
+
+import numpy as np
+
+from pfemp1 import kernels
+from pfemp1.knob import generate_distances_AA, r_var
+
+tolerance=1e-9 #largest accepted difference (nm) of the distances
+replicates=100
+
+#time per knob with the loop placement and the given backend
+def time_per_knob(name,molecules):
+	kernels.use(name)
+	rng=np.random.default_rng(0)
+	generate_distances_AA(molecules,r_var,'loop',rng) #compile the kernels outside of the timing
+	start=time.time()
+	for i in range(replicates):
+		generate_distances_AA(molecules,r_var,'loop',rng)
+	return (time.time()-start)/replicates
+
+#exit status 1 if the backends differ by more than tolerance for one of the molecule counts
+def main():
+	if not kernels.numba_available:
+		print("numba is not installed, only the NumPy backend is available: parity check skipped")
+		return 0
+	failed=False
+	print("%10s %16s %16s %16s" % ("molecules","difference (nm)","numba knob (s)","numpy knob (s)"))
+	for molecules in [2,5,10,20]:
+		difference=kernels.parity(molecules,replicates,seed=molecules)
+		failed|=difference>tolerance
+		print("%10d %16.3g %16.3g %16.3g" % (molecules,difference,time_per_knob('numba',molecules),time_per_knob('numpy',molecules)))
+	return 1 if failed else 0
+
+if __name__=="__main__":
+	sys.exit(main())
@@ -0,0 +1,17 @@
+##############################################################################################################################################################################
+# This script converts the text output of earlier runs of average-distance.py ("distribution_data_AA.txt", one line of space separated nearest neighbor distances for
+# each molecule count from 2 to 10) into the binary format of pfemp1/storage.py ("distribution_data_AA.bin").
+##############################################################################################################################################################################
+
+import sys
+
+from pfemp1.knob import r_var
+from pfemp1.storage import convert_text_file
+
+#convert the text file with the distances of 2 to 10 molecules on the AA knob
+def main(text_path="distribution_data_AA.txt",binary_path="distribution_data_AA.bin"):
+	metadata=[{'geometry':'AA','molecules':molecules,'r_thresh':r_var} for molecules in range(2,11)]
+	convert_text_file(text_path,binary_path,metadata)
+
+if __name__=="__main__":
+	main(*sys.argv[1:3])
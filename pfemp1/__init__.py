@@ -0,0 +1,11 @@
+##############################################################################################################################################################################
+# Importable helpers shared by the analysis scripts (average-distance.py, density-in-sectors.py, distribution-on-half-sphere.py).
+# The functions most often needed are available directly from the package; importing it does no computation and does not import matplotlib, scipy or numba.
+# The analyses themselves are run with python -m pfemp1 <command> (see __main__.py) or the scripts.
+##############################################################################################################################################################################
+
+from pfemp1.geometry import unit_vectors, overlap_cos, surface_distance
+from pfemp1.knob import generate_sample, generate_distances_AA, generate_distances_AS, distance, distance_polar, r_var, R_AA, R_AS, thetas_AA, thetas_AS
+from pfemp1.ensemble import ensemble_distances_AA, ensemble_distances_AS
+from pfemp1.neighbours import nearest_neighbour_distances
+from pfemp1.conversion import density_in_rings, convert_counts, bootstrap_fractions
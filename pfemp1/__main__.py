@@ -0,0 +1,35 @@
+##############################################################################################################################################################################
+# Entry point: python -m pfemp1 <command> runs one of the analyses
+#     average-distance              nearest neighbor distances on the AA knob for 2 to 10 molecules (pfemp1/average_distance.py)
+#     density-in-sectors            conversion of the measured counts in x-slices to arclength rings (pfemp1/sectors.py)
+#     distribution-on-half-sphere   point clouds of the AA and AS knob (pfemp1/halfsphere.py)
+#     pair-correlation              geodesic pair correlation function g(s) on the AA knob for 2 to 10 molecules (pfemp1/pair_correlation.py)
+#     sweep                         nearest neighbor statistics for a grid of geometry, footprint area and molecule count (pfemp1/sweep.py)
+#     erythrocyte                   cell level nearest neighbor statistics for knobs with distributed radii and copy numbers (pfemp1/erythrocyte.py)
+#     analytic                      comparison of the analytic low density distribution with the simulation (pfemp1/analytic.py)
+# The module of a command is only imported when it is run.
+##############################################################################################################################################################################
+
+import importlib
+import sys
+
+commands={
+	'average-distance':'pfemp1.average_distance',
+	'density-in-sectors':'pfemp1.sectors',
+	'distribution-on-half-sphere':'pfemp1.halfsphere',
+	'pair-correlation':'pfemp1.pair_correlation',
+	'sweep':'pfemp1.sweep',
+	'erythrocyte':'pfemp1.erythrocyte',
+	'analytic':'pfemp1.analytic',
+}
+
+def main(argv=None):
+	argv=sys.argv[1:] if argv is None else argv
+	if len(argv)!=1 or argv[0] not in commands:
+		print("usage: python -m pfemp1 {%s}" % ','.join(commands))
+		return 2
+	importlib.import_module(commands[argv[0]]).main()
+	return 0
+
+if __name__=="__main__":
+	sys.exit(main())
@@ -0,0 +1,182 @@
+##############################################################################################################################################################################
+# Semi-analytic nearest neighbor distance distribution for independent placement, as fast path for low densities.
+# If the molecules are placed independently (the rings drawn from the section fractions, within a ring like the simulation with c=cos(elevation) uniform and phi
+# uniform, no exclusion), a molecule u sees another molecule within the folded distance s=R*beta (distance() in knob.py) with probability
+#     q(u,beta) = sum_k p_k [P_k(cap(u,beta)) + P_k(cap(-u,beta))],
+# where P_k(cap) is the probability of ring section k inside a spherical cap, the integral over c of the fraction of the circle of latitude inside the cap (closed
+# formula) per ring. Its nearest neighbor is farther than s with probability (1-q)^(N-1), which is averaged over the position of the molecule with Gauss-Legendre
+# quadrature. This gives the survival function S(s) of the center to center distance on a grid, and from it the histogram, mean, standard deviation and quantiles of
+# the surface to surface distance. q only depends on the ring sections, so it is tabulated once per geometry.
+# Without exclusion the result differs from the random sequential adsorption of the simulation only if overlaps would be frequent. evaluate() therefore uses it when
+# the expected number of overlapping pairs per knob is below a threshold and runs the Monte Carlo simulation otherwise; mode='validate' runs both.
+# Note definition of theta (as in knob.py): theta is the polar angle which is 0 when pointing along the x-axis and pi/2 along the z-axis (the elevation).
+##############################################################################################################################################################################
+
+import functools
+
+import numpy as np
+
+from pfemp1.knob import r_var, geometries, seed
+from pfemp1.ensemble import ensemble_distances
+from pfemp1.parallel import iter_replicates, seed_for
+from pfemp1.statistics import StreamingStatistics
+
+nodes=32 #Gauss-Legendre nodes per ring for the position of the molecule and per piece of the integral over a ring
+grid=513 #points of the distance grid between 0 and R*pi/2
+threshold=0.01 #largest expected number of overlapping pairs per knob for which evaluate() uses the analytic distribution
+
+#fraction of the circle of latitude with c=cos(elevation) (upper half-sphere) that lies inside the cap with angular radius beta around the point with elevation e
+def latitude_fraction(c,e,beta):
+	z=np.sqrt(np.maximum(1.0-c*c,0.0))
+	with np.errstate(divide='ignore',invalid='ignore'):
+		g=(np.cos(beta)-np.sin(e)*z)/(np.cos(e)*c)
+	return np.arccos(np.clip(np.nan_to_num(g,nan=1.0),-1.0,1.0))/np.pi
+
+#probability that a point of the ring section between c_lo and c_hi (c=cos(elevation) is uniform in a ring section, see placement.draw_candidates) lies inside the
+#cap with angular radius beta around the point with elevation e; e and beta broadcast. The integral over c is split where the circles of latitude touch the cap and
+#every piece is integrated with nodes that cluster at its ends, where the fraction has a square root behaviour.
+def ring_cap_probability(e,beta,c_lo,c_hi):
+	e,beta=np.broadcast_arrays(np.asarray(e,dtype=float),np.asarray(beta,dtype=float))
+	touching=[]
+	for elevation in (e+beta,e-beta):
+		elevation=np.where(elevation>np.pi/2.0,np.pi-elevation,np.where(elevation<-np.pi/2.0,-np.pi-elevation,elevation))
+		touching.append(np.where(elevation>=0,np.clip(np.cos(elevation),c_lo,c_hi),c_lo))
+	breaks=np.sort(np.stack([np.full(e.shape,c_lo)]+touching+[np.full(e.shape,c_hi)],axis=-1),axis=-1)
+	t,w=np.polynomial.legendre.leggauss(nodes)
+	t=(t+1.0)/2.0
+	x=(1.0-np.cos(np.pi*t))/2.0
+	dx=np.pi/2.0*np.sin(np.pi*t)*w/2.0
+	probability=0.0
+	for i in range(3):
+		lo=breaks[...,i,np.newaxis]
+		width=breaks[...,i+1,np.newaxis]-lo
+		c=lo+width*x
+		probability=probability+np.sum(latitude_fraction(c,e[...,np.newaxis],beta[...,np.newaxis])*width*dx,axis=-1)
+	return probability/(c_hi-c_lo)
+
+#bounds of c=cos(elevation) of the ring sections, shape (rings,2)
+def ring_cosines(thetas):
+	c=np.cos(np.asarray(thetas,dtype=float))
+	return np.stack((np.minimum(c[:-1],c[1:]),np.maximum(c[:-1],c[1:])),axis=1)
+
+#probability that a molecule placed independently with the section fractions lies within the folded angle beta of a molecule with c=cos(elevation); c and beta
+#broadcast
+def neighbour_probability(c,beta,thetas,distribution):
+	p=np.asarray(distribution,dtype=float)
+	p=p/p.sum()
+	e=np.arccos(np.clip(np.asarray(c,dtype=float),0.0,1.0))
+	q=0.0
+	for (c_lo,c_hi),p_k in zip(ring_cosines(thetas),p):
+		for center in (e,-e): #cap around the molecule and around its antipode
+			q=q+p_k*ring_cap_probability(center,beta,c_lo,c_hi)
+	return q
+
+#values of c and weights (summing to the section fractions) of the quadrature over the position of a molecule
+def molecule_positions(thetas,distribution):
+	t,w=np.polynomial.legendre.leggauss(nodes)
+	bounds=ring_cosines(thetas)
+	p=np.asarray(distribution,dtype=float)
+	p=p/p.sum()
+	c=bounds[:,0,np.newaxis]+(bounds[:,1]-bounds[:,0])[:,np.newaxis]*(t+1.0)/2.0
+	return c.ravel(),(p[:,np.newaxis]*w/2.0).ravel()
+
+#neighbour_probability at the positions of the quadrature and the angles of the distance grid, shape (grid,positions); it only depends on the ring sections, so it
+#is computed once per geometry and used for every molecule count
+@functools.lru_cache(maxsize=16)
+def probability_table(thetas,distribution):
+	c,w=molecule_positions(thetas,distribution)
+	beta=np.linspace(0.0,np.pi/2.0,grid)
+	table=neighbour_probability(c[np.newaxis,:],beta[:,np.newaxis],thetas,distribution)
+	table.setflags(write=False)
+	return table
+
+#expected number of pairs of molecules of a knob that would overlap (closer than 2 r_thresh) with independent placement
+def expected_overlaps(molecules,r_thresh,R,thetas,distribution):
+	c,w=molecule_positions(thetas,distribution)
+	beta=min(2*r_thresh/float(R),np.pi/2.0)
+	return molecules*(molecules-1)/2.0*np.sum(w*neighbour_probability(c,beta,thetas,distribution))
+
+#trapezoidal rule
+def integrate(f,x):
+	return np.sum((f[1:]+f[:-1])*np.diff(x))/2.0
+
+class AnalyticDistribution:
+
+	#nearest neighbor distribution of independently placed molecules; histogram holds the probabilities of the bins of edges (surface to surface distance),
+	#like the normalized histogram of StreamingStatistics
+	def __init__(self,molecules,r_thresh,R,thetas,distribution,edges):
+		self.molecules=molecules
+		self.r_thresh=r_thresh
+		self.edges=np.asarray(edges,dtype=float)
+		self.s=np.linspace(0.0,R*np.pi/2.0,grid)
+		_,w=molecule_positions(thetas,distribution)
+		q=probability_table(tuple(thetas),tuple(distribution))
+		self.survival=np.sum(w*np.power(np.clip(1.0-q,0.0,1.0),molecules-1),axis=1)
+		self.survival[-1]=0.0 #the two caps cover the whole sphere at pi/2
+		self.mean=integrate(self.survival,self.s)-2*r_thresh
+		self.second=integrate(2*self.s*self.survival,self.s)
+		self.histogram=-np.diff(self.survival_at(self.edges))
+		self.expected_overlaps=expected_overlaps(molecules,r_thresh,R,thetas,distribution)
+
+	#probability that the surface to surface distance is larger than x
+	def survival_at(self,x):
+		return np.interp(np.asarray(x,dtype=float)+2*self.r_thresh,self.s,self.survival,left=1.0,right=0.0)
+
+	def std(self):
+		return np.sqrt(max(self.second-(self.mean+2*self.r_thresh)**2,0.0))
+
+	#no sampling error
+	def sem(self):
+		return 0.0
+
+	def quantile(self,q):
+		return np.interp(q,1.0-self.survival,self.s)-2*self.r_thresh
+
+	def centers(self):
+		return 0.5*(self.edges[1:]+self.edges[:-1])
+
+#streaming statistics of N simulated knobs (ensemble engine) with the histogram bins of edges
+def monte_carlo(N,molecules,r_thresh,geometry,edges,seed=seed,pool=None):
+	statistics=StreamingStatistics(edges,replicate_size=molecules)
+	for distances in iter_replicates(ensemble_distances,N,(molecules,r_thresh,geometry.R,geometry.thetas,geometry.distribution),seed_for(seed,molecules),pool,ensemble=True):
+		statistics.add(distances)
+	return statistics
+
+#largest difference of the cumulative distributions of two results on their common bins
+def cdf_difference(a,b):
+	cdf_a=np.cumsum(a.histogram/np.sum(a.histogram))
+	cdf_b=np.cumsum(b.histogram/np.sum(b.histogram))
+	return np.max(np.abs(cdf_a-cdf_b))
+
+#nearest neighbor distribution of knobs of the geometry ('AA', 'AS' or a knob.Geometry) with the given number of molecules. mode='analytic' and
+#mode='monte_carlo' (N knobs) choose the method, mode='auto' takes the analytic distribution if the expected number of overlapping pairs per knob is below the
+#threshold. mode='validate' runs both and returns a dict with both results, the difference of the means in standard errors of the simulation and the largest
+#difference of the cumulative distributions.
+def evaluate(molecules,r_thresh=r_var,geometry='AA',N=100000,mode='auto',threshold=threshold,edges=None,seed=seed,pool=None):
+	if isinstance(geometry,str):
+		geometry=geometries[geometry]
+	if edges is None:
+		edges=np.linspace(-2*r_thresh,geometry.R*np.pi/2.0-2*r_thresh,51)
+	if mode=='auto':
+		mode='analytic' if expected_overlaps(molecules,r_thresh,geometry.R,geometry.thetas,geometry.distribution)<threshold else 'monte_carlo'
+	if mode=='analytic':
+		return AnalyticDistribution(molecules,r_thresh,geometry.R,geometry.thetas,geometry.distribution,edges)
+	if mode=='monte_carlo':
+		return monte_carlo(N,molecules,r_thresh,geometry,edges,seed,pool)
+	if mode!='validate':
+		raise ValueError("unknown mode: %s (use 'auto', 'analytic', 'monte_carlo' or 'validate')" % mode)
+	analytic=AnalyticDistribution(molecules,r_thresh,geometry.R,geometry.thetas,geometry.distribution,edges)
+	simulated=monte_carlo(N,molecules,r_thresh,geometry,edges,seed,pool)
+	return {'analytic':analytic,'monte_carlo':simulated,'expected_overlaps':analytic.expected_overlaps,
+		'mean_difference':(analytic.mean-simulated.mean)/simulated.sem(),'cdf_difference':cdf_difference(analytic,simulated)}
+
+#validation for the AA and AS knob with 2 to 10 molecules at r_var and at a quarter of its footprint area
+def main(N=20000):
+	print("%-4s %6s %9s %9s %10s %14s %9s %8s" % ("knob","r","molecules","overlaps","analytic","simulated","diff/sem","max dCDF"))
+	for name in ('AA','AS'):
+		for r_thresh in (r_var,r_var/2.0):
+			for molecules in range(2,11):
+				result=evaluate(molecules,r_thresh,name,N,'validate')
+				simulated=result['monte_carlo']
+				print("%-4s %6.2f %9d %9.4f %10.4f %7.4f+-%.4f %9.2f %8.4f" % (name,r_thresh,molecules,result['expected_overlaps'],result['analytic'].mean,simulated.mean,simulated.sem(),
+					result['mean_difference'],result['cdf_difference']))
@@ -0,0 +1,59 @@
+##############################################################################################################################################################################
+# Areas of the patches formed by x-slices and arclength rings on the half-sphere, computed numerically instead of with Mathematica.
+# The half-sphere (z>=0) of radius 1 is cut into n_slices x-slices of equal width (|x| between k/n_slices and (k+1)/n_slices) and into n_rings rings along the
+# arclength, bounded by the polar angles arcsin(j/n_rings), i.e. by the distance rho=sqrt(x^2+y^2) to the z-axis. As in density-in-sectors.py, all areas are given
+# for the quarter x>=0, y>=0 and in units of R^2.
+# On the unit sphere a patch between the distances a and b from the z-axis and between x=c and x=d has the area
+#     integral_a^b L(rho) rho/sqrt(1-rho^2) drho,    L(rho)=arccos(min(1,c/rho))-arccos(min(1,d/rho)),
+# which is evaluated with rho=sin(phi) and Gauss-Legendre quadrature. The integration interval is split where rho=c and rho=d and a quadratic substitution at the
+# lower end of every piece removes the square root behaviour of L there, so a few dozen nodes give machine precision.
+##############################################################################################################################################################################
+
+import functools
+import os
+
+import numpy as np
+
+nodes=32 #Gauss-Legendre nodes per piece of the integration interval
+cache_directory=os.environ.get('PFEMP1_CACHE',os.path.join(os.path.expanduser('~'),'.cache','pfemp1'))
+
+#area (unit sphere, quarter x>=0, y>=0) of the patch between the distances a<b from the z-axis and between x=c and x=d
+def patch_area(a,b,c,d):
+	t,w=np.polynomial.legendre.leggauss(nodes)
+	s=(t+1.0)/2.0
+	w=w/2.0
+	breaks=sorted(set([np.arcsin(a),np.arcsin(b)]+[np.arcsin(x) for x in (c,d) if a<x<b]))
+	area=0.0
+	for lo,hi in zip(breaks[:-1],breaks[1:]):
+		phi=lo+(hi-lo)*np.power(s,2)
+		rho=np.sin(phi)
+		with np.errstate(divide='ignore'):
+			L=np.arccos(np.minimum(1.0,c/rho))-np.arccos(np.minimum(1.0,d/rho))
+		area+=np.sum(w*L*rho*2.0*(hi-lo)*s)
+	return area
+
+#matrix of the patch areas in units of R^2, rows are x-slices (from the center outwards), columns are rings (from inner to outer)
+def compute_area_matrix(n_slices,n_rings):
+	areas=np.zeros((n_slices,n_rings))
+	for k in range(n_slices):
+		for i in range(n_rings):
+			areas[k,i]=patch_area(i/float(n_rings),(i+1)/float(n_rings),k/float(n_slices),(k+1)/float(n_slices))
+	return areas
+
+#area matrix for the given numbers of slices and rings, cached in memory and on disk (directory PFEMP1_CACHE, default ~/.cache/pfemp1)
+@functools.lru_cache(maxsize=None)
+def area_matrix(n_slices,n_rings=None):
+	if n_rings is None:
+		n_rings=n_slices
+	path=os.path.join(cache_directory,'areas-%d-%d-%d.npy' % (n_slices,n_rings,nodes))
+	try:
+		areas=np.load(path)
+	except (OSError,ValueError):
+		areas=compute_area_matrix(n_slices,n_rings)
+		try:
+			os.makedirs(cache_directory,exist_ok=True)
+			np.save(path,areas)
+		except OSError:
+			pass
+	areas.setflags(write=False)
+	return areas
@@ -0,0 +1,155 @@
+##############################################################################################################################################################################
+# Simulation behind average-distance.py: disc like molecules are distributed on the surface of an idealized half-sphere according to a given distribution and the
+# distribution of nearest neighbor distances (measured as surface-to-surface distance) is calculated. main() runs all molecule counts, writes the distances and makes
+# the figures; matplotlib is only imported when the figures are made.
+# Note definition of theta and phi: theta is the polar angle which is 0 when pointing along the x-axis and pi/2 along the z-axis. phi is the azimuthal angle (0 to 2 pi). 
+##############################################################################################################################################################################
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from pfemp1.knob import generate_distances_AA, r_var, R_AA, thetas_AA, percentage_in_each_section_AA, seed, workers
+from pfemp1.ensemble import ensemble_distances_AA
+from pfemp1.parallel import iter_replicates, seed_for, chunk_size
+from pfemp1.statistics import StreamingStatistics
+from pfemp1.storage import DistanceWriter
+from pfemp1.checkpoint import Checkpoint
+from pfemp1.cache import ResultCache, copy_values
+from pfemp1 import instrumentation
+
+tolerance=None #standard error (nm) of the mean nearest neighbor distance at which a molecule count stops early (adaptive mode); None runs all replicates
+min_replicates=2000 #replicates that are always run before the tolerance is checked
+
+#fixed histogram bins from full overlap (-2 r_var) to the largest surface to surface distance distance() can return on the AA knob
+histogram_edges=np.linspace(-2*r_var,R_AA*np.pi/2.0-2*r_var,51)
+
+#N knobs with the given number of molecules are simulated (on the pool, if given). The result only depends on the seed, not on the number of workers.
+#placement='ensemble' simulates a whole chunk of knobs as one array computation, the other placement modes are passed on to generate_distances_AA.
+#The distances are appended to the binary writer (see pfemp1/storage.py) chunk by chunk and only their streaming statistics are kept in memory.
+#With a checkpoint (see pfemp1/checkpoint.py) the state is saved every "every" chunks and a run that was interrupted continues where it stopped.
+#With a tolerance, N is the budget: chunks are run until the standard error of the mean distance (from the spread of the knob means) drops below the tolerance.
+#With a cache (see pfemp1/cache.py), a run that was finished before with the same parameters and code is copied from the cache instead of simulated, and new runs
+#are added to it.
+def routine_AA(N,molecules,r_var,writer,placement='ensemble',seed=seed,pool=None,checkpoint=None,every=20,tolerance=None,cache=None):
+	key='AA-%d' % molecules
+	settings={'N':N,'r_thresh':r_var,'placement':placement,'seed':seed,'tolerance':tolerance}
+	state=checkpoint.get(key) if checkpoint is not None else None
+	if state is not None and state['settings']!=settings:
+		raise ValueError("checkpoint of %s was written with different settings: %s" % (key,state['settings']))
+	if state is not None and state['done']:
+		return state['statistics']
+
+	metadata={'geometry':'AA','molecules':molecules,'r_thresh':r_var,'replicates':N,'seed':seed,'placement':placement,'tolerance':tolerance}
+	entry=None
+	if state is None and cache is not None:
+		address=cache.key(R=R_AA,thetas=thetas_AA,distribution=percentage_in_each_section_AA,min_replicates=min_replicates,chunk_size=chunk_size,**metadata)
+		cached=cache.get(address)
+		if cached is not None:
+			statistics,distances=cached
+			writer.begin(**metadata)
+			copy_values(distances,0,writer)
+			writer.end()
+			if checkpoint is not None:
+				checkpoint.save(key,{'settings':settings,'done':True,'chunks':None,'statistics':statistics,'position':writer.position()})
+			return statistics
+		#only runs that start from the beginning are cached
+		entry=cache.entry(address,**metadata)
+		entry.writer.begin(**metadata)
+
+	if state is not None:
+		statistics=state['statistics']
+		start=state['chunks']
+		writer.resume(*state['position'])
+	else:
+		statistics=StreamingStatistics(histogram_edges,replicate_size=molecules)
+		start=0
+		writer.begin(**metadata)
+
+	#an interrupted or failed run must not leave a partial cache entry behind
+	try:
+		if placement=='ensemble':
+			chunks=iter_replicates(ensemble_distances_AA,N,(molecules,r_var),seed_for(seed,molecules),pool,ensemble=True,start=start)
+		else:
+			chunks=iter_replicates(generate_distances_AA,N,(molecules,r_var,placement),seed_for(seed,molecules),pool,start=start)
+		for i,distances in enumerate(chunks,start+1):
+			with instrumentation.stage('statistics'):
+				statistics.add(distances)
+			with instrumentation.stage('output'):
+				writer.write(distances)
+				if entry is not None:
+					entry.writer.write(distances)
+			converged=tolerance is not None and statistics.replicates>=min_replicates and statistics.sem()<=tolerance
+			if converged:
+				break
+			if checkpoint is not None and i%every==0:
+				checkpoint.save(key,{'settings':settings,'done':False,'chunks':i,'statistics':statistics,'position':writer.position()})
+		chunks.close()
+		writer.end()
+		if entry is not None:
+			entry.commit(statistics)
+	except BaseException:
+		if entry is not None:
+			entry.discard()
+		raise
+	if checkpoint is not None:
+		checkpoint.save(key,{'settings':settings,'done':True,'chunks':None,'statistics':statistics,'position':writer.position()})
+	return statistics
+
+#run all molecule counts from 2 to 10 and return their statistics. The distributions of the nearest neighbor distances are written to the given file. If a checkpoint
+#of an interrupted run exists, the run is continued and everything written after the last checkpoint is discarded. With plot=True the figures are saved.
+#By default every molecule count runs its full number of replicates; with a tolerance (nm) the adaptive mode stops a molecule count early (see routine_AA).
+def main(plot=True,tolerance=tolerance):
+	checkpoint=Checkpoint("distribution_data_AA.checkpoint")
+	f = DistanceWriter("distribution_data_AA.bin",append=checkpoint.resuming())
+	if checkpoint.resuming():
+		f.resume(None,0,max(state['position'][2] for state in checkpoint.state.values()))
+	cache=ResultCache() #finished runs are kept in ~/.cache/pfemp1/results (or PFEMP1_CACHE/results), so the figures can be made again without simulation
+	with ProcessPoolExecutor(workers) as pool:
+		statistics_2=routine_AA(2*3*5*6*7*8*9,2,r_var,f,pool=pool,checkpoint=checkpoint,tolerance=tolerance,cache=cache)
+		statistics_3=routine_AA(4*5*6*7*8*9,3,r_var,f,pool=pool,checkpoint=checkpoint,tolerance=tolerance,cache=cache)
+		statistics_4=routine_AA(3*5*6*7*8*9,4,r_var,f,pool=pool,checkpoint=checkpoint,tolerance=tolerance,cache=cache)
+		statistics_5=routine_AA(4*3*6*7*8*9,5,r_var,f,pool=pool,checkpoint=checkpoint,tolerance=tolerance,cache=cache)
+		statistics_6=routine_AA(4*5*3*7*8*9,6,r_var,f,pool=pool,checkpoint=checkpoint,tolerance=tolerance,cache=cache)
+		statistics_7=routine_AA(4*5*6*3*8*9,7,r_var,f,pool=pool,checkpoint=checkpoint,tolerance=tolerance,cache=cache)
+		statistics_8=routine_AA(4*5*6*7*3*9,8,r_var,f,pool=pool,checkpoint=checkpoint,tolerance=tolerance,cache=cache)
+		statistics_9=routine_AA(4*5*6*7*8*3,9,r_var,f,pool=pool,checkpoint=checkpoint,tolerance=tolerance,cache=cache)
+		statistics_10=routine_AA(3*2*6*7*8*9,10,r_var,f,pool=pool,checkpoint=checkpoint,tolerance=tolerance,cache=cache)
+
+	f.close()
+	checkpoint.remove()
+	#with PFEMP1_INSTRUMENT=1 the placement counters and stage timers are written next to the distances
+	if instrumentation.enabled:
+		instrumentation.write_report("distribution_data_AA")
+
+	all_statistics=[statistics_2,statistics_3,statistics_4,statistics_5,statistics_6,statistics_7,statistics_8,statistics_9,statistics_10]
+	for molecules,s in zip(range(2,11),all_statistics):
+		print("%d molecules: %d knobs, mean %.4f nm, standard error %.4f nm" % (molecules,s.replicates,s.mean,s.sem()))
+	if plot:
+		plot_distances(all_statistics)
+	return all_statistics
+
+#histogram of the distances for 3, 5, 7 and 9 molecules (average_distance_1.png) and mean distance with standard error against the number of molecules
+#(average_distance_2.png), for the statistics of 2 to 10 molecules
+def plot_distances(all_statistics):
+	import matplotlib.pyplot as plt
+
+	distance_av=[s.mean for s in all_statistics]
+	distance_std_mean=[s.sem() for s in all_statistics]
+
+	#Plot distirbution of nearest neighbor distances
+	shown=all_statistics[1:9:2]
+	plt.hist([s.centers() for s in shown], histogram_edges,weights=[s.histogram for s in shown],edgecolor='None', rwidth=0.9,label=['3 molecules', '5 molecules', '7 molecules', '9 molecules'])
+	plt.legend()
+	plt.xlabel('nearest neighbour distance (nm)')
+	plt.ylabel('events')
+	plt.savefig('average_distance_1.png')
+	plt.close()
+
+	#Plot average distance as function of molecules per knob
+	plt.errorbar([2,3,4,5,6,7,8,9,10],distance_av,yerr=distance_std_mean,fmt='o')
+	plt.xlim(1,11)
+	plt.xlabel('molecules per knob')
+	plt.ylabel('average nearest neighbour distance (nm)')
+	plt.savefig('average_distance_2.png')
+	plt.close()
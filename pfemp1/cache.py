@@ -0,0 +1,133 @@
+##############################################################################################################################################################################
+# Content-addressed cache of finished simulation runs.
+# A run is identified by the SHA-256 hash of everything its result depends on (geometry, section distribution, molecule count, r_thresh, number of replicates, seed,
+# placement, ... and the version of the code, a hash of the sources of the pfemp1 package). Every entry is a directory named after the hash with the parameters
+# (params.json), the streaming statistics (statistics.pickle) and the distances in the binary format of storage.py (distances.bin). Entries are written to a temporary
+# directory and renamed when the run is finished, so an interrupted run never leaves a partial entry. Old entries are evicted by age and, least recently used first,
+# by the total size of the cache.
+##############################################################################################################################################################################
+
+import functools
+import glob
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import time
+
+from pfemp1.areas import cache_directory
+from pfemp1.storage import DistanceWriter, DistanceFile
+
+copy_block=1000000 #values copied at once from a cache entry to the output
+
+#hash of the sources of the pfemp1 package, changes whenever the code that produces the results changes
+@functools.lru_cache(maxsize=None)
+def code_version():
+	digest=hashlib.sha256()
+	for path in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)),'*.py'))):
+		digest.update(os.path.basename(path).encode('utf-8'))
+		with open(path,'rb') as f:
+			digest.update(f.read())
+	return digest.hexdigest()
+
+class ResultCache:
+
+	#entries are kept in directory; after every new entry, entries that were not used for max_age seconds are removed and then the least recently used ones until
+	#the cache is smaller than max_bytes (None switches the respective limit off)
+	def __init__(self,directory=os.path.join(cache_directory,'results'),max_bytes=10*1024**3,max_age=None):
+		self.directory=directory
+		self.max_bytes=max_bytes
+		self.max_age=max_age
+		os.makedirs(directory,exist_ok=True)
+
+	#key of a run: hash of the parameters (JSON with sorted keys) and the code version
+	def key(self,**parameters):
+		parameters=dict(parameters,code_version=code_version())
+		return hashlib.sha256(json.dumps(parameters,sort_keys=True).encode('utf-8')).hexdigest()
+
+	def path(self,key):
+		return os.path.join(self.directory,key)
+
+	def __contains__(self,key):
+		return os.path.isdir(self.path(key))
+
+	#statistics of a finished run and the DistanceFile with its distances, None if the run is not cached. The entry is marked as used.
+	def get(self,key):
+		path=self.path(key)
+		try:
+			with open(os.path.join(path,'statistics.pickle'),'rb') as f:
+				statistics=pickle.load(f)
+			distances=DistanceFile(os.path.join(path,'distances.bin'))
+		except (OSError,ValueError,EOFError,pickle.UnpicklingError):
+			return None
+		os.utime(path)
+		return statistics,distances
+
+	#start a new entry, returns an Entry whose writer takes the distances of the run
+	def entry(self,key,**parameters):
+		return Entry(self,key,dict(parameters,code_version=code_version()))
+
+	#entries (path, size in bytes, time of the last use), least recently used first
+	def entries(self):
+		found=[]
+		for name in os.listdir(self.directory):
+			path=os.path.join(self.directory,name)
+			if name.startswith('.') or not os.path.isdir(path):
+				continue
+			size=sum(os.path.getsize(os.path.join(path,f)) for f in os.listdir(path))
+			found.append((path,size,os.path.getmtime(path)))
+		return sorted(found,key=lambda entry:entry[2])
+
+	def evict(self):
+		#temporary directories of runs that were interrupted more than a day ago
+		for name in os.listdir(self.directory):
+			path=os.path.join(self.directory,name)
+			if name.startswith('.') and os.path.isdir(path) and time.time()-os.path.getmtime(path)>86400:
+				shutil.rmtree(path,ignore_errors=True)
+		entries=self.entries()
+		if self.max_age is not None:
+			now=time.time()
+			for entry in [e for e in entries if now-e[2]>self.max_age]:
+				shutil.rmtree(entry[0],ignore_errors=True)
+				entries.remove(entry)
+		if self.max_bytes is not None:
+			total=sum(size for _,size,_ in entries)
+			for path,size,_ in entries:
+				if total<=self.max_bytes:
+					break
+				shutil.rmtree(path,ignore_errors=True)
+				total-=size
+
+class Entry:
+
+	def __init__(self,cache,key,parameters):
+		self.cache=cache
+		self.key=key
+		self.temporary=tempfile.mkdtemp(prefix='.'+key,dir=cache.directory)
+		with open(os.path.join(self.temporary,'params.json'),'w') as f:
+			json.dump(parameters,f,indent=1,sort_keys=True)
+		self.writer=DistanceWriter(os.path.join(self.temporary,'distances.bin'),append=False)
+
+	#store the statistics and move the entry to its place in the cache
+	def commit(self,statistics):
+		self.writer.close()
+		with open(os.path.join(self.temporary,'statistics.pickle'),'wb') as f:
+			pickle.dump(statistics,f,protocol=pickle.HIGHEST_PROTOCOL)
+		target=self.cache.path(self.key)
+		if os.path.isdir(target):
+			shutil.rmtree(self.temporary)
+		else:
+			os.replace(self.temporary,target)
+		self.cache.evict()
+
+	def discard(self):
+		self.writer.close()
+		shutil.rmtree(self.temporary,ignore_errors=True)
+
+#copy the values of record i of a DistanceFile block by block to an open record of a DistanceWriter
+def copy_values(distances,i,writer):
+	values=distances.values(i)
+	for start in range(0,len(values),copy_block):
+		writer.write(values[start:start+copy_block])
@@ -0,0 +1,41 @@
+##############################################################################################################################################################################
+# Checkpoints for long runs of average-distance.py.
+# The state of every run (number of finished chunks, streaming statistics, position in the binary output) is pickled to one file, which is replaced atomically on every
+# save. The random state does not have to be stored: the stream of a chunk is derived from the master seed and the position of the chunk (see parallel.py), so the
+# number of finished chunks determines where a restarted run continues.
+##############################################################################################################################################################################
+
+import os
+import pickle
+
+class Checkpoint:
+
+	def __init__(self,path):
+		self.path=path
+		self.state={}
+		if os.path.exists(path):
+			with open(path,'rb') as f:
+				self.state=pickle.load(f)
+
+	#True if the file existed, i.e. an earlier run is continued
+	def resuming(self):
+		return bool(self.state)
+
+	#saved state of the run with the given key (None if it was not started)
+	def get(self,key):
+		return self.state.get(key)
+
+	def save(self,key,run_state):
+		self.state[key]=run_state
+		temporary=self.path+'.tmp'
+		with open(temporary,'wb') as f:
+			pickle.dump(self.state,f,protocol=pickle.HIGHEST_PROTOCOL)
+			f.flush()
+			os.fsync(f.fileno())
+		os.replace(temporary,self.path)
+
+	#remove the checkpoint after a run was completed
+	def remove(self):
+		if os.path.exists(self.path):
+			os.remove(self.path)
+		self.state={}
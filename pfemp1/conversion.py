@@ -0,0 +1,83 @@
+##############################################################################################################################################################################
+# Conversion of a particle distribution recorded in x-slices of the half-sphere to a distribution in rings along the arclength (see density-in-sectors.py).
+# With areas[k,i] the patch of x-slice k and ring i (quarter of the half-sphere, pfemp1/areas.py), the counted density in a slice is
+#     zone_area*density_x[k] = sum_i areas[k,i]*density_phi[i],
+# where zone_area is the area of the quarter of a slice. Slice k only reaches the rings i>=k, so the matrix is upper triangular and the conversion is one back
+# substitution.
+##############################################################################################################################################################################
+
+import functools
+
+import numpy as np
+
+from pfemp1.areas import area_matrix
+
+#solve U x = b for an upper triangular matrix U, b can have further columns (one per right hand side)
+def solve_upper_triangular(U,b):
+	b=np.asarray(b,dtype=float)
+	x=np.zeros_like(b)
+	for i in range(len(b)-1,-1,-1):
+		x[i]=(b[i]-np.tensordot(U[i,i+1:],x[i+1:],axes=1))/U[i,i]
+	return x
+
+#area (nm^2) of each x-slice of the half-sphere of radius R cut into n slices
+def slice_areas(n,R):
+	return 2.0*np.sum(area_matrix(n),axis=1)*np.power(R,2)
+
+#area (nm^2) of each arclength ring of the half-sphere of radius R cut into n rings
+def ring_areas(n,R):
+	return 2.0*np.sum(area_matrix(n),axis=0)*np.power(R,2)
+
+#density in the arclength rings (inner to outer) from the density in the x-slices (center outwards) on the half-sphere of radius R. density_x can also be a
+#(M,n) matrix with one row per knob or cell.
+def density_in_rings(density_x,R):
+	density_x=np.asarray(density_x,dtype=float)
+	areas=area_matrix(density_x.shape[-1])*np.power(R,2)
+	zone_area=np.sum(areas,axis=1)
+	return solve_upper_triangular(areas,(zone_area*density_x).T).T
+
+#linear map T from the counts in n x-slices to the densities in n rings on the unit half-sphere, density_phi=T@counts/R^2. Since zone_area*density_x=counts/2,
+#T is the inverse of the area matrix times 1/2; it is computed once per n.
+@functools.lru_cache(maxsize=None)
+def count_to_density_matrix(n):
+	T=solve_upper_triangular(area_matrix(n),np.eye(n)/2.0)
+	T.setflags(write=False)
+	return T
+
+#batch conversion of a (M,n) matrix of counts in the x-slices (one row per knob or cell, R a scalar or one radius per row) into the (M,n) densities (per nm^2)
+#and fractions of the particles in the arclength rings, with one matrix product
+def convert_counts(counts,R):
+	counts=np.asarray(counts,dtype=float)
+	n=counts.shape[-1]
+	unit_density=counts@count_to_density_matrix(n).T
+	R=np.asarray(R,dtype=float)
+	if R.ndim>0:
+		R=R[...,np.newaxis]
+	densities=unit_density/np.power(R,2)
+	#the ring areas scale with R^2 as well, so the fractions do not depend on R
+	with np.errstate(invalid='ignore',divide='ignore'):
+		fractions=unit_density*2.0*np.sum(area_matrix(n),axis=0)/np.sum(counts,axis=-1,keepdims=True)
+	return densities,fractions
+
+#fraction of the N particles that lies in each ring for the given density in the rings
+def ring_fractions(density_phi,R,N):
+	return np.asarray(density_phi)*ring_areas(len(density_phi),R)/N
+
+#draws resampled count vectors for the counts in the x-slices: the total is kept and the counts are redistributed over the slices with the observed proportions
+#(multinomial resampling, the same as a bootstrap of the individual particles), returns a (draws,n) matrix
+def resample_counts(counts,draws,rng):
+	counts=np.asarray(counts,dtype=float)
+	N=int(round(counts.sum()))
+	return rng.multinomial(N,counts/counts.sum(),size=draws)
+
+#bootstrap of the fractions of the particles in the arclength rings for the counts in the x-slices of a knob of radius R. All resampled count vectors are converted
+#with one matrix product (convert_counts). Returns the lower and upper bound of the central confidence band with the given level for every ring and a boolean
+#array that flags the resampled rows in which the back substitution gives a negative density in some ring.
+def bootstrap_fractions(counts,R,draws=20000,level=0.95,rng=None):
+	if rng is None:
+		rng=np.random.default_rng()
+	densities,fractions=convert_counts(resample_counts(counts,draws,rng),R)
+	alpha=(1.0-level)/2.0
+	lower,upper=np.quantile(fractions,[alpha,1.0-alpha],axis=0)
+	negative=np.any(densities<0,axis=1)
+	return lower,upper,negative
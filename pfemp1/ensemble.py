@@ -0,0 +1,111 @@
+##############################################################################################################################################################################
+# Ensemble engine: K knobs with the same number of molecules are simulated at once with arrays of shape (K,N,3).
+# The rules are the same as for generate_distances_AA/AS in knob.py: the molecules are distributed over the ring sections, the rings are filled from the first to the
+# last, every molecule is placed by random sequential adsorption with up to 100 additional phi trials per theta and overlap is allowed in a ring after more than 100
+# consecutive failures. Step t places the t-th molecule of every knob, so the Python loops run over molecules and retries, never over knobs.
+##############################################################################################################################################################################
+
+import numpy as np
+
+from pfemp1.geometry import unit_vectors, overlap_cos, surface_distance
+from pfemp1.knob import R_AA, R_AS, thetas_AA, thetas_AS, percentage_in_each_section_AA, percentage_in_each_section_AS
+from pfemp1.placement import section_bounds
+from pfemp1 import instrumentation
+
+#number of molecules in each ring section for K knobs, shape (K,rings). Picking a section uniformly and accepting it with probability distribution[x]
+#(generate_sample in knob.py) is the same as a multinomial draw with the normalized distribution. A distribution of shape (K,rings) gives every knob its own.
+def sector_occupation(K,number,distribution,rng):
+	p=np.asarray(distribution,dtype=float)
+	if p.ndim==2:
+		return rng.multinomial(number,p/p.sum(axis=1,keepdims=True))
+	return rng.multinomial(number,p/p.sum(),size=K)
+
+#ring section of every molecule slot, shape (K,N), sorted from the first to the last ring in each knob
+def slot_rings(occupation,N):
+	return (np.arange(N)[np.newaxis,:,np.newaxis]>=np.cumsum(occupation,axis=1)[:,np.newaxis,:]).sum(axis=2)
+
+#place N molecules on each of K knobs and return their unit vectors, shape (K,N,3). geometry is only used as label by pfemp1/instrumentation.py. The section
+#bounds can be passed in if they are computed once for many calls (see pfemp1/sweep.py). r_thresh (shape (K,)) and the distribution (shape (K,rings)) can be
+#given per knob, so knobs with different parameters are simulated in one batch (see pfemp1/inference.py).
+def place_ensemble(K,N,r_thresh,R,thetas,distribution,rng,retries=100,max_failures=100,geometry=None,bounds=None):
+	rings=slot_rings(sector_occupation(K,N,distribution,rng),N)
+	if instrumentation.enabled:
+		instrumentation.context[:2]=[geometry,N]
+	if bounds is None:
+		bounds=section_bounds(thetas)
+	limit=np.broadcast_to(overlap_cos(R,2*np.asarray(r_thresh,dtype=float)),(K,))
+
+	units=np.zeros((K,N,3))
+	count=np.zeros(K,dtype=int)
+	too_small=np.zeros(K,dtype=bool)
+
+	for t in range(N):
+		#count and too_small belong to one ring section, like in a call of uniform_in_sector
+		new_ring=rings[:,t]!=rings[:,t-1] if t>0 else np.ones(K,dtype=bool)
+		count[new_ring]=0
+		too_small[new_ring]=False
+
+		pending=np.arange(K)
+		while len(pending):
+			x_0=bounds[rings[pending,t],0]
+			x_1=bounds[rings[pending,t],1]
+			phi=2*np.pi*rng.random(len(pending))
+			theta=np.pi-np.arccos(1.0-2.0*(x_0+rng.random(len(pending))*(x_1-x_0)))
+			u=unit_vectors(theta,phi)
+			placed=units[pending,:t]
+			accepted=np.all(np.abs(np.einsum('kij,kj->ki',placed,u))<=limit[pending,np.newaxis],axis=1)|too_small[pending]
+			units[pending[accepted],t]=u[accepted]
+
+			#try to find another phi placement that does not produce an overlap
+			failed=np.flatnonzero(~accepted)
+			if len(failed):
+				phis=2*np.pi*rng.random((len(failed),retries))
+				v=unit_vectors(np.repeat(theta[failed][:,np.newaxis],retries,axis=1),phis)
+				valid=np.all(np.abs(np.einsum('kij,krj->kri',placed[failed],v))<=limit[pending[failed],np.newaxis,np.newaxis],axis=2)
+				found=valid.any(axis=1)
+				first=np.argmax(valid,axis=1)
+				units[pending[failed[found]],t]=v[found,first[found]]
+				accepted[failed[found]]=True
+
+			count[pending[accepted]]=0
+			count[pending]+=1
+			if instrumentation.enabled:
+				ring=rings[pending,t]
+				instrumentation.count_rings('proposals',ring)
+				instrumentation.count_rings('acceptances',ring[accepted])
+				instrumentation.count_rings('unchecked',ring[too_small[pending]])
+				instrumentation.count_rings('retries',ring[failed])
+				instrumentation.count_rings('retry_proposals',ring[failed],np.where(found,first+1,retries) if len(failed) else None)
+				instrumentation.count_rings('fallbacks',ring[(count[pending]>max_failures)&~too_small[pending]])
+			#this is executed if the density is too high to prevent overlap
+			too_small[pending[count[pending]>max_failures]]=True
+			pending=pending[~accepted]
+
+	return units
+
+#nearest neighbor distances (center to center) within each knob for unit vectors of shape (K,N,3), returns shape (K,N)
+def ensemble_nearest_neighbour_distances(units,R):
+	K,N,_=units.shape
+	if N<2:
+		raise ValueError("at least two points are needed for nearest neighbor distances")
+	c=np.abs(np.einsum('kij,klj->kil',units,units))
+	c[:,np.arange(N),np.arange(N)]=-np.inf
+	nearest=np.argmax(c,axis=2)
+	points=R*units
+	return surface_distance(points,np.take_along_axis(points,nearest[:,:,np.newaxis],axis=1),R)
+
+#K knobs with N_pf molecules each, returns the nearest neighbor (surface to surface) distances with shape (K,N_pf); r_thresh and the distribution can be given
+#per knob like in place_ensemble
+def ensemble_distances(K,N_pf,r_thresh,R,thetas,distribution,rng=None,geometry=None,bounds=None):
+	if rng is None:
+		rng=np.random.default_rng()
+	with instrumentation.stage('placement'):
+		units=place_ensemble(K,N_pf,r_thresh,R,thetas,distribution,rng,geometry=geometry,bounds=bounds)
+	with instrumentation.stage('neighbours'):
+		return ensemble_nearest_neighbour_distances(units,R)-2.0*np.reshape(r_thresh,(-1,1))
+
+def ensemble_distances_AA(K,N_pf,r_thresh,rng=None):
+	return ensemble_distances(K,N_pf,r_thresh,R_AA,thetas_AA,percentage_in_each_section_AA,rng,'AA')
+
+def ensemble_distances_AS(K,N_pf,r_thresh,rng=None):
+	return ensemble_distances(K,N_pf,r_thresh,R_AS,thetas_AS,percentage_in_each_section_AS,rng,'AS')
@@ -0,0 +1,124 @@
+##############################################################################################################################################################################
+# Simulation of whole infected erythrocytes: every cell has many knobs whose radii are drawn from a (measured) radius distribution and whose numbers of PfEMP1
+# molecules are drawn from a (measured) copy number histogram. All knobs of a cell have the ring sections of the AA or AS knob, scaled to their radius.
+# The knobs of a cell are processed in chunks of at most chunk_knobs knobs. Within a chunk, knobs with the same number of molecules whose radii fall into the same
+# bin of width radius_step are placed together in one ensemble batch at the radius of the bin center (placement='ensemble'); the other placement modes simulate every
+# knob with generate_distances_AA/AS at its own radius. Only the streaming statistics of the nearest neighbor distances of each cell are kept.
+##############################################################################################################################################################################
+
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from pfemp1.knob import generate_distances_AA, generate_distances_AS, r_var, R_AA, geometries, seed, workers
+from pfemp1.ensemble import ensemble_distances
+from pfemp1.parallel import seed_for
+from pfemp1.statistics import StreamingStatistics
+from pfemp1.storage import write_table
+
+chunk_knobs=20000 #knobs drawn and simulated at once
+radius_step=0.5 #width (nm) of the radius bins of the batched placement
+largest_radius=200.0 #upper end (nm) of the histogram of the surface to surface distances
+stream=zlib.crc32(b'cell') #first key of the random streams of the cells, keeps them apart from the streams seed_for(seed,molecules) of routine_AA
+columns=('cell','knobs','knobs_with_neighbours','molecules','mean_radius','mean','std','sem','q05','median','q95','minimum','maximum')
+
+class Cell:
+
+	#radii: measured knob radii (nm) that are resampled, or a function radii(n,rng) that returns n radii. copy_numbers: histogram of the number of molecules per
+	#knob, copy_numbers[n] is the frequency of knobs with n molecules. geometry: 'AA' or 'AS', whose ring sections and section fractions all knobs have.
+	def __init__(self,knobs,radii,copy_numbers,geometry='AA',r_thresh=r_var):
+		self.knobs=knobs
+		self.radii=radii
+		p=np.asarray(copy_numbers,dtype=float)
+		self.copy_numbers=p/p.sum()
+		self.geometry=geometries[geometry]
+		self.r_thresh=r_thresh
+
+	def draw_radii(self,n,rng):
+		if callable(self.radii):
+			return np.asarray(self.radii(n,rng),dtype=float)
+		return rng.choice(np.asarray(self.radii,dtype=float),n)
+
+	def draw_molecules(self,n,rng):
+		return rng.choice(len(self.copy_numbers),n,p=self.copy_numbers)
+
+	#empty statistics of the surface to surface nearest neighbor distances
+	def statistics(self):
+		return StreamingStatistics(np.linspace(-2*self.r_thresh,largest_radius,101))
+
+#groups of knobs that are placed together: (radius, molecules, indices of the knobs) for all knobs with at least two molecules. With placement='ensemble' the
+#radii are rounded to the center of their bin of width radius_step, otherwise every knob is its own group.
+def radius_groups(radii,molecules,placement='ensemble'):
+	valid=np.flatnonzero(molecules>=2)
+	if valid.size==0:
+		return []
+	if placement!='ensemble':
+		return [(radii[i],molecules[i],np.array([i])) for i in valid]
+	bins=np.floor(radii[valid]/radius_step).astype(np.int64)
+	order=np.lexsort((bins,molecules[valid]))
+	keys=np.stack((molecules[valid][order],bins[order]),axis=1)
+	starts=np.flatnonzero(np.concatenate(([True],np.any(keys[1:]!=keys[:-1],axis=1))))
+	return [((keys[a,1]+0.5)*radius_step,keys[a,0],valid[order[a:b]]) for a,b in zip(starts,np.append(starts[1:],len(order)))]
+
+#simulate all knobs of one cell and return the statistics of its nearest neighbor distances together with the numbers of knobs, of knobs with at least two
+#molecules and of molecules and the sum of the knob radii. The random stream only depends on the seed and the index of the cell. The mean is taken over all
+#distances, so knobs with more molecules weigh more; its standard error (StreamingStatistics.sem) accounts for the different numbers of molecules per knob.
+def simulate_cell(cell,index,seed=seed,placement='ensemble'):
+	statistics=cell.statistics()
+	totals={'knobs':0,'knobs_with_neighbours':0,'molecules':0,'radius_sum':0.0}
+	chunks=[min(chunk_knobs,cell.knobs-start) for start in range(0,cell.knobs,chunk_knobs)]
+	for size,s in zip(chunks,seed_for(seed,stream,index).spawn(len(chunks))):
+		rng=np.random.default_rng(s)
+		radii=cell.draw_radii(size,rng)
+		molecules=cell.draw_molecules(size,rng)
+		totals['knobs']+=size
+		totals['molecules']+=int(molecules.sum())
+		totals['radius_sum']+=float(radii.sum())
+		for R,N,knobs in radius_groups(radii,molecules,placement):
+			if placement=='ensemble':
+				geometry=cell.geometry
+				distances=ensemble_distances(len(knobs),N,cell.r_thresh,R,geometry.thetas,geometry.distribution,rng,geometry.name,geometry.bounds)
+			elif cell.geometry.name=='AA':
+				distances=np.array(generate_distances_AA(N,cell.r_thresh,placement,rng,R))
+			else:
+				distances=np.array(generate_distances_AS(N,cell.r_thresh,placement,rng,R))
+			statistics.add(distances,replicate_size=N)
+			totals['knobs_with_neighbours']+=len(knobs)
+	return statistics,totals
+
+#table row of a cell; a cell without knobs with at least two molecules has no distances, its statistics are nan
+def row(index,statistics,totals):
+	values={'knobs':totals['knobs'],'knobs_with_neighbours':totals['knobs_with_neighbours'],'molecules':totals['molecules'],
+		'mean_radius':totals['radius_sum']/max(totals['knobs'],1)}
+	if statistics.count==0:
+		return dict(values,cell=index,**{c:np.nan for c in ('mean','std','sem','q05','median','q95','minimum','maximum')})
+	return dict(values,cell=index,mean=statistics.mean,std=statistics.std(),sem=statistics.sem(),q05=statistics.quantile(0.05),median=statistics.quantile(0.5),
+		q95=statistics.quantile(0.95),minimum=statistics.minimum,maximum=statistics.maximum)
+
+#simulate the given number of cells (on the pool, if given) and return the statistics of every cell and of all cells together, and one table row per cell
+def simulate_cells(cell,cells,seed=seed,placement='ensemble',pool=None):
+	if pool is None:
+		results=[simulate_cell(cell,i,seed,placement) for i in range(cells)]
+	else:
+		results=[f.result() for f in [pool.submit(simulate_cell,cell,i,seed,placement) for i in range(cells)]]
+	pooled=cell.statistics()
+	for statistics,_ in results:
+		pooled.merge(statistics)
+	return [statistics for statistics,_ in results],pooled,[row(i,statistics,totals) for i,(statistics,totals) in enumerate(results)]
+
+#example radius distribution: normal around the AA radius with 15% spread, cut off below 20 nm
+def example_radii(n,rng):
+	return np.maximum(rng.normal(R_AA,0.15*R_AA,n),20.0)
+
+#example run with 10 cells of 5000 knobs, example_radii and 2 to 10 molecules per knob with equal frequency (no knobs without or with one molecule), written to
+#erythrocyte_results.csv. Measured distributions are passed to Cell instead.
+def main(cells=10,knobs=5000,path="erythrocyte_results.csv"):
+	cell=Cell(knobs,example_radii,[0,0]+[1]*9)
+	with ProcessPoolExecutor(workers) as pool:
+		_,pooled,rows=simulate_cells(cell,cells,pool=pool)
+	write_table(path,columns,rows)
+	for r in rows:
+		print("cell %d: %d knobs, %d molecules, mean nearest neighbor distance %.4f nm, standard error %.4f nm" % (r['cell'],r['knobs'],r['molecules'],r['mean'],r['sem']))
+	print("all cells: mean %.4f nm, standard error %.4f nm" % (pooled.mean,pooled.sem()))
+	return rows
@@ -0,0 +1,191 @@
+##############################################################################################################################################################################
+# Placement with tracking of the free area, for densities close to jamming.
+# The ring section is covered by voxels, rectangles in the coordinates (x,phi) of draw_candidates (x is the variable that is mapped to theta, see
+# placement.ring_bounds; it is uniform in cos(theta), i.e. in the distance from the knob axis, not in area). A voxel is removed as soon as it lies completely inside
+# the excluded cap of a placed disc (or of its antipode, since distance() folds angles above pi/2). Candidates are drawn uniformly in (x,phi) from the remaining voxels
+# and checked exactly with a SphereCellIndex, so the points have the density of the other placement modes, restricted to the free part of the ring section. If the
+# candidates of a whole block are rejected, the voxels are halved in both directions, which removes the parts that are covered by several discs together. When no voxel
+# is left, the ring section is jammed.
+# The placement rules differ from uniform_in_sector and uniform_in_sector_batch: a rejected candidate is not retried with up to 100 new phi at the same theta (which
+# favours thetas where free space is left) and there is no switch to placement with overlap after 100 failed thetas, only when the section is jammed. The nearest
+# neighbor statistics are therefore not the same as with placement='batch', also at moderate densities (AA knob, r_var, 10 molecules: mean 5.96 nm instead of
+# 5.82 nm).
+# Without exclusion (r_thresh=0) the points are placed with draw_candidates, without overlap check.
+# Note definition of theta and phi (as in knob.py): theta is the polar angle which is 0 when pointing along the x-axis and pi/2 along the z-axis.
+##############################################################################################################################################################################
+
+import warnings
+
+import numpy as np
+
+from pfemp1.geometry import unit_vectors
+from pfemp1.placement import ring_bounds, draw_candidates
+from pfemp1.spatial_index import SphereCellIndex
+from pfemp1 import instrumentation
+
+block=64 #candidates drawn at once
+min_radius=1e-7 #voxels are not refined below this size (radians); a voxel of this size is only removed if its center is covered
+max_voxels=10**5 #largest number of initial voxels of a ring section; for very small discs the initial voxels are larger than a quarter of d_min
+
+class JammingWarning(UserWarning):
+	pass
+
+class Jammed(RuntimeError):
+
+	#placed of n particles could be placed in the ring section before no free area was left
+	def __init__(self,placed,n):
+		RuntimeError.__init__(self,"ring section jammed after %d of %d particles" % (placed,n))
+		self.placed=placed
+		self.n=n
+
+#theta of the variable x of ring_bounds
+def theta_of(x):
+	return np.pi-np.arccos(1.0-2.0*x)
+
+class FreeArea:
+
+	#voxels of the ring section between the two angles on a sphere of radius R, for discs that have to keep the distance d_min>0. The initial voxels are about a
+	#quarter of d_min wide, but there are at most about max_voxels of them.
+	def __init__(self,theta_0_real,theta_1_real,R,d_min):
+		x_0,x_1=ring_bounds(theta_0_real,theta_1_real)
+		self.beta=d_min/float(R)
+		if self.beta<=0:
+			raise ValueError("free area tracking needs a positive minimal distance, got %g" % d_min)
+		theta_a,theta_b=theta_of(x_0),theta_of(x_1)
+		height=abs(theta_b-theta_a)
+		width=2*np.pi*max(np.cos(theta_a),np.cos(theta_b))
+		size=max(self.beta/4.0,np.sqrt(height*width/max_voxels))
+		n_x=max(1,int(np.ceil(height/size)))
+		n_phi=max(1,int(np.ceil(width/size)))
+		x,phi=np.meshgrid(np.linspace(x_0,x_1,n_x+1)[:-1],np.linspace(0,2*np.pi,n_phi+1)[:-1],indexing='ij')
+		self.x=x.ravel()
+		self.phi=phi.ravel()
+		self.dx=(x_1-x_0)/n_x
+		self.dphi=2*np.pi/n_phi
+		self.update()
+
+	#centers of the voxels and the angular radius of a circle around the center that contains the voxel
+	def update(self):
+		theta_a=theta_of(self.x)
+		theta_b=theta_of(self.x+self.dx)
+		theta_c=theta_of(self.x+self.dx/2.0)
+		self.centers=unit_vectors(theta_c,self.phi+self.dphi/2.0)
+		#go along the meridian to the latitude of the point, then along the parallel
+		widest=np.where(theta_a*theta_b<0,1.0,np.cos(np.minimum(np.abs(theta_a),np.abs(theta_b))))
+		self.radius=np.maximum(np.abs(theta_c-theta_a),np.abs(theta_b-theta_c))+widest*self.dphi/2.0
+		self.covered_cos=np.where(self.radius<self.beta,np.cos(np.minimum(self.beta-self.radius,np.pi)),np.inf)
+
+	def __len__(self):
+		return len(self.x)
+
+	#keep only the voxels of the mask
+	def keep(self,mask):
+		self.x=self.x[mask]
+		self.phi=self.phi[mask]
+		self.centers=self.centers[mask]
+		self.radius=self.radius[mask]
+		self.covered_cos=self.covered_cos[mask]
+
+	#remove the voxels that lie completely inside the excluded caps of the points us (shape (k,3))
+	def remove_covered(self,us):
+		us=np.asarray(us,dtype=float).reshape(-1,3)
+		if len(us)==0 or len(self)==0:
+			return
+		covered=np.max(np.abs(self.centers@us.T),axis=1)>=self.covered_cos
+		self.keep(~covered)
+
+	#halve the voxels in both directions and remove the new voxels that are covered by one of the points us. Returns False if the voxels are already at the
+	#smallest size, in which case only the voxels whose center is covered are removed.
+	def refine(self,us,limit):
+		if len(self) and np.max(self.radius)<min_radius:
+			if len(us):
+				self.keep(np.max(np.abs(self.centers@np.asarray(us).T),axis=1)<=limit)
+			return False
+		self.dx/=2.0
+		self.dphi/=2.0
+		self.x=np.concatenate((self.x,self.x+self.dx,self.x,self.x+self.dx))
+		self.phi=np.concatenate((self.phi,self.phi,self.phi+self.dphi,self.phi+self.dphi))
+		self.update()
+		self.remove_covered(us)
+		return True
+
+	#k candidates distributed uniformly in (x,phi) over the voxels (which all have the same size in x and phi, not the same area)
+	def draw(self,k,rng):
+		i=rng.integers(0,len(self),k)
+		theta=theta_of(self.x[i]+rng.random(k)*self.dx)
+		phi=self.phi[i]+rng.random(k)*self.dphi
+		return theta,phi
+
+#Given two angles, n particles are distributed over the free part of the ring section that is limited by the two angles (with the density of draw_candidates),
+#without overlap of the discs. The index holds all points placed so far (as in uniform_in_sector_indexed) and the accepted points are added to it. If the ring
+#section is jammed before all particles are placed, jam='raise' raises Jammed; jam='overlap' issues a JammingWarning and places the remaining particles without
+#overlap check, like the too_small fallback of uniform_in_sector.
+def uniform_in_sector_free(theta_0_real,theta_1_real,n,R,r_thresh,index,rng,jam='overlap'):
+
+	uniform_on_sphere=np.empty((2,n))
+	if n==0:
+		return uniform_on_sphere
+
+	#no excluded area: every candidate is accepted
+	if r_thresh<=0:
+		theta,phi=draw_candidates(*ring_bounds(theta_0_real,theta_1_real),n,rng)
+		uniform_on_sphere[0]=theta
+		uniform_on_sphere[1]=phi
+		index.add(unit_vectors(theta,phi))
+		if instrumentation.enabled:
+			instrumentation.count(proposals=n,acceptances=n)
+		return uniform_on_sphere
+
+	area=FreeArea(theta_0_real,theta_1_real,R,2*r_thresh)
+	area.remove_covered(index.vectors[:index.size])
+
+	points=0
+	proposals=0 #counter for pfemp1/instrumentation.py
+	while points<n:
+		if len(area)==0:
+			rest=n-points
+			if instrumentation.enabled:
+				instrumentation.count(proposals=proposals,acceptances=points,fallbacks=1)
+				if jam!='raise':
+					instrumentation.count(proposals=rest,acceptances=rest,unchecked=rest)
+			if jam=='raise':
+				raise Jammed(points,n)
+			warnings.warn("ring section jammed after %d of %d particles, the remaining particles are placed with overlap" % (points,n),JammingWarning)
+			x_0,x_1=ring_bounds(theta_0_real,theta_1_real)
+			phi=2*np.pi*rng.random(rest)
+			theta=theta_of(x_0+rng.random(rest)*(x_1-x_0))
+			uniform_on_sphere[0][points:]=theta
+			uniform_on_sphere[1][points:]=phi
+			index.add(unit_vectors(theta,phi))
+			return uniform_on_sphere
+
+		theta,phi=area.draw(block,rng)
+		u=unit_vectors(theta,phi)
+		free=index.free_mask(u)
+		proposals+=block
+		if not free.any():
+			area.refine(index.vectors[:index.size],index.limit)
+			continue
+		for i in np.flatnonzero(free):
+			if points==n:
+				break
+			#earlier candidates of the block that were accepted may overlap with this one
+			if not index.is_free(u[i]):
+				continue
+			uniform_on_sphere[0][points]=theta[i]
+			uniform_on_sphere[1][points]=phi[i]
+			index.add(u[i])
+			area.remove_covered(u[i])
+			points+=1
+
+	if instrumentation.enabled:
+		instrumentation.count(proposals=proposals,acceptances=n)
+	return uniform_on_sphere
+
+#returns a placement function with the signature of uniform_in_sector that tracks the free area of every ring section and keeps the points of one knob in a
+#persistent SphereCellIndex (already_existing_points is not used)
+def free_area_placement(R,r_thresh,jam='overlap'):
+	index=SphereCellIndex(R,2*r_thresh)
+	def place(theta_0_real,theta_1_real,n,R,r_thresh,already_existing_points,rng):
+		return uniform_in_sector_free(theta_0_real,theta_1_real,n,R,r_thresh,index,rng,jam)
+	return place
@@ -0,0 +1,33 @@
+##############################################################################################################################################################################
+# Vectorized geometry on the surface of the idealized knob (half-sphere).
+# Note definition of theta and phi (as in knob.py): theta is the polar angle which is 0 when pointing along the x-axis and pi/2 along the z-axis. phi is the
+# azimuthal angle (0 to 2 pi).
+##############################################################################################################################################################################
+
+import numpy as np
+
+#convert arrays of angles to unit vectors, the last axis holds (x,y,z)
+def unit_vectors(theta,phi):
+	theta=np.asarray(theta,dtype=float)
+	phi=np.asarray(phi,dtype=float)
+	c=np.cos(theta)
+	return np.stack((c*np.cos(phi),c*np.sin(phi),np.sin(theta)),axis=-1)
+
+#distance() in knob.py evaluates R*arcsin(sin(alpha)) for the angle alpha between two points, i.e. angles above pi/2 are folded back to pi-alpha.
+#Two points are therefore closer than d_min exactly when |cos(alpha)| is larger than the value returned here. d_min can also be an array (one value per knob).
+def overlap_cos(R,d_min):
+	if np.ndim(d_min):
+		a=np.asarray(d_min,dtype=float)/float(R)
+		return np.where(a>=np.pi/2.0,-1.0,np.cos(np.minimum(a,np.pi/2.0)))
+	a=d_min/float(R)
+	if a>=np.pi/2.0:
+		return -1.0
+	return np.cos(a)
+
+#Calculate the distance between points on the surface of the sphere, same formula as distance() in knob.py for arrays p and q of Cartesian coordinates
+#(last axis (x,y,z))
+def surface_distance(p,q,R):
+	p=np.asarray(p,dtype=float)
+	q=np.asarray(q,dtype=float)
+	d=np.sqrt(np.power(p[...,0]-q[...,0],2)+np.power(p[...,1]-q[...,1],2)+np.power(p[...,2]-q[...,2],2))
+	return R*np.arcsin(d*np.sqrt(4.0*np.power(R,2)-np.power(d,2))*0.5/np.power(R,2))
@@ -0,0 +1,47 @@
+##############################################################################################################################################################################
+# Point clouds behind distribution-on-half-sphere.py: this module distributes a given number of particles on a half sphere according to a predefined discrete distribution along the arclength on the sphere. We assume the 
+# particles to be distributed uniformly within each circular ring section. The script produces a list of x,y,z-coordinates of the relevant points on the surface of the 
+# half-sphere. Clouds of many knobs are streamed to .npy or PLY files (pfemp1/pointcloud.py). main() writes the clouds of the AA and AS knob.
+# Note definition of theta and phi: theta is the azimuthal angle (0 to 2 pi) and phi is the polar angle which is 0 along the z-axis. 
+##############################################################################################################################################################################
+
+import numpy as np
+
+from pfemp1.pointcloud import points_in_rings, write_point_cloud
+
+#N*fraction[i] (rounded) particles are placed in ring section i, the coordinates are returned with shape (number of particles,3)
+def generate_coordinates(fraction, N, R, phis, rng=np.random):
+	points=[int(np.round(N*f)) for f in fraction]
+	return points_in_rings(np.repeat(np.arange(len(points)),points),R,phis,rng)
+
+#The half-sphere corresponding to the AA RBC is devided into 5 sections along the arclength (circular rings)
+def generate_coordinates_AA(fraction, N, R, phis):
+	return generate_coordinates(fraction[:5], N, R, phis)
+
+def generate_coordinates_AS(fraction, N, R, phis):
+	return generate_coordinates(fraction[:7], N, R, phis)
+
+
+percentage_in_each_section_AA=[0.047076342223133109, 0.17041750404891309, 0.14288596678141868, 0.3429168902432384, 0.2967032967032967]
+percentage_in_each_section_AS=[0.03638455687749774, 0.061833159380116055, 0.18647013167014589, 0.25457432455680268, 0.21226516051360983, 0.097094298202712412, 0.15137836879911531]
+
+phis_AA=[np.arcsin(a) for a in [0,0.2,0.4,0.6,0.8,1]]
+phis_AS=[np.arcsin(a/7.0) for a in range(8)]
+
+R_AA=79.206/2.0
+R_AS=108.289/2.0
+
+knobs=10000 #knobs in the streamed point clouds
+
+#write the coordinates of one AA and one AS knob (text) and the point clouds of many knobs (PLY)
+def main():
+	points_AS=generate_coordinates_AS(percentage_in_each_section_AS, 150, R_AS/R_AA, phis_AS)
+	points_AA=generate_coordinates_AA(percentage_in_each_section_AA, 120, 1, phis_AA)
+	np.savetxt("points_AS.txt",points_AS)
+	np.savetxt("points_AA.txt",points_AA)
+
+	#point clouds of many knobs, the rings of the particles are drawn from the fractions
+	write_point_cloud("points_AS.ply",knobs,150,percentage_in_each_section_AS,R_AS/R_AA,phis_AS)
+	write_point_cloud("points_AA.ply",knobs,120,percentage_in_each_section_AA,1,phis_AA)
+
+
@@ -0,0 +1,150 @@
+##############################################################################################################################################################################
+# Likelihood-free fit (approximate Bayesian computation) of the section distribution and the footprint radius to measured nearest neighbor distances.
+# Candidate parameters are drawn from the prior (fractions from a flat Dirichlet distribution, r_thresh uniform between r_min and r_max). Every candidate is simulated
+# with the ensemble engine in rounds of knobs; all candidates of a round are one batch of knobs with their own r_thresh and fractions. The summary statistics of a
+# candidate (mean, standard deviation and quantiles of the center to center nearest neighbor distances) are compared to the ones of the data, in units of the
+# standard deviation of the data. After every round, candidates whose distance is larger than the current acceptance threshold by more than z times the noise of
+# their partial summaries are dropped, so the rejected candidates only cost one or two rounds. The candidates with the smallest distances after the last round form
+# the approximate posterior.
+# The simulated summaries (histogram counts and moments per candidate and round) are stored in the cache directory (see pfemp1/areas.py), so a repeated fit with
+# the same prior, seed and simulation settings only simulates the rounds that are missing.
+##############################################################################################################################################################################
+
+import hashlib
+import json
+import os
+import zlib
+
+import numpy as np
+
+from pfemp1.areas import cache_directory
+from pfemp1.cache import code_version
+from pfemp1.ensemble import ensemble_distances
+from pfemp1.parallel import seed_for
+from pfemp1.knob import r_var, geometries
+
+quantiles=(0.1,0.25,0.5,0.75,0.9)
+bins=400 #histogram bins of the center to center distance between 0 and R*pi/2, the quantiles are interpolated within a bin
+batch_knobs=20000 #knobs simulated at once
+seed=20180706
+
+#summary statistics of distances: mean, standard deviation and the quantiles
+def summaries(distances):
+	distances=np.asarray(distances,dtype=float).ravel()
+	return np.concatenate(([distances.mean(),distances.std()],np.quantile(distances,quantiles)))
+
+#the same summaries for every row of histogram counts (n,bins) with the sums of the values and of their squares
+def histogram_summaries(counts,total,squares,edges):
+	n=counts.sum(axis=1)
+	mean=total/n
+	std=np.sqrt(np.maximum(squares/n-mean**2,0.0))
+	cumulative=np.concatenate((np.zeros((len(counts),1)),np.cumsum(counts,axis=1)),axis=1)/n[:,np.newaxis]
+	result=[mean,std]
+	for q in quantiles:
+		i=np.clip(np.sum(cumulative<q,axis=1)-1,0,counts.shape[1]-1)
+		rows=np.arange(len(counts))
+		width=cumulative[rows,i+1]-cumulative[rows,i]
+		fraction=np.where(width>0,(q-cumulative[rows,i])/np.where(width>0,width,1.0),0.0)
+		result.append(edges[i]+fraction*(edges[i+1]-edges[i]))
+	return np.stack(result,axis=1)
+
+class SimulationTable:
+
+	#histogram counts and moments of the center to center nearest neighbor distances of every candidate and round; done marks the rounds that were simulated.
+	#With a path, the table is loaded from and saved to an .npz file.
+	def __init__(self,candidates,rounds,path=None):
+		self.path=path
+		self.counts=np.zeros((candidates,rounds,bins),dtype=np.int32)
+		self.total=np.zeros((candidates,rounds))
+		self.squares=np.zeros((candidates,rounds))
+		self.done=np.zeros((candidates,rounds),dtype=bool)
+		if path is not None and os.path.exists(path):
+			with np.load(path) as stored:
+				if stored['counts'].shape==self.counts.shape:
+					self.counts=stored['counts']
+					self.total=stored['total']
+					self.squares=stored['squares']
+					self.done=stored['done']
+
+	#write to a temporary file and rename it, so an interrupted save never leaves a broken table
+	def save(self):
+		if self.path is None:
+			return
+		temporary=self.path+'.tmp.npz'
+		np.savez(temporary,counts=self.counts,total=self.total,squares=self.squares,done=self.done)
+		os.replace(temporary,self.path)
+
+	#summed counts and moments of the first rounds of the given candidates
+	def accumulated(self,candidates,rounds):
+		return self.counts[candidates,:rounds].sum(axis=1),self.total[candidates,:rounds].sum(axis=1),self.squares[candidates,:rounds].sum(axis=1)
+
+#fractions (M,rings) and r_thresh (M,) of M candidates from the prior
+def draw_prior(M,rings,r_min,r_max,rng):
+	return rng.dirichlet(np.ones(rings),M),rng.uniform(r_min,r_max,M)
+
+#simulate one round of knobs for the given candidates and store it in the table. The candidates are split into batches of at most batch_knobs knobs; the random
+#stream of a batch depends on the seed, the round and the candidates in it.
+def simulate_round(table,candidates,round_,fractions,r_thresh,geometry,molecules,knobs,edges,seed):
+	per_batch=max(1,batch_knobs//knobs)
+	for start in range(0,len(candidates),per_batch):
+		selected=candidates[start:start+per_batch]
+		rng=np.random.default_rng(seed_for(seed,round_,zlib.crc32(np.asarray(selected,dtype=np.int64).tobytes())))
+		r=np.repeat(r_thresh[selected],knobs)
+		distances=ensemble_distances(len(r),molecules,r,geometry.R,geometry.thetas,np.repeat(fractions[selected],knobs,axis=0),rng,geometry.name,geometry.bounds)
+		distances=(distances+2.0*r[:,np.newaxis]).reshape(len(selected),-1)
+		i=np.clip(((distances-edges[0])*(bins/(edges[-1]-edges[0]))).astype(np.int64),0,bins-1)
+		table.counts[selected,round_]=np.array([np.bincount(row,minlength=bins) for row in i])
+		table.total[selected,round_]=distances.sum(axis=1)
+		table.squares[selected,round_]=np.sum(distances**2,axis=1)
+		table.done[selected,round_]=True
+
+#Fit the section fractions and r_thresh of a geometry ('AA', 'AS' or a knob.Geometry) to measured center to center nearest neighbor distances (nm) of knobs with
+#the given number of molecules. candidates are drawn from the prior and simulated in up to rounds rounds of knobs each; the accept best fraction of the candidates is
+#returned as dict with their fractions, r_thresh and distances, the posterior means and standard deviations and the number of simulated knobs.
+def fit(observed,molecules,geometry='AA',candidates=2000,rounds=4,knobs=50,accept=0.02,z=2.0,r_min=0.5*r_var,r_max=1.5*r_var,seed=seed,cache=True):
+	if isinstance(geometry,str):
+		geometry=geometries[geometry]
+	rings=len(geometry.thetas)-1
+	edges=np.linspace(0.0,geometry.R*np.pi/2.0,bins+1)
+	observed_summaries=summaries(observed)
+	scale=observed_summaries[1]
+
+	fractions,r_thresh=draw_prior(candidates,rings,r_min,r_max,np.random.default_rng(seed))
+	path=None
+	if cache:
+		settings={'R':geometry.R,'thetas':geometry.thetas,'molecules':molecules,'candidates':candidates,'rounds':rounds,'knobs':knobs,'r_min':r_min,'r_max':r_max,
+			'seed':seed,'bins':bins,'batch_knobs':batch_knobs,'code_version':code_version()}
+		directory=os.path.join(cache_directory,'inference')
+		os.makedirs(directory,exist_ok=True)
+		path=os.path.join(directory,hashlib.sha256(json.dumps(settings,sort_keys=True).encode('utf-8')).hexdigest()+'.npz')
+	table=SimulationTable(candidates,rounds,path)
+
+	keep=max(1,int(round(accept*candidates)))
+	live=np.arange(candidates)
+	simulated=0
+	for round_ in range(rounds):
+		missing=live[~table.done[live,round_]]
+		if len(missing):
+			simulate_round(table,missing,round_,fractions,r_thresh,geometry,molecules,knobs,edges,seed)
+			simulated+=len(missing)*knobs
+			table.save()
+		distance=np.sqrt(np.mean(((histogram_summaries(*table.accumulated(live,round_+1),edges)-observed_summaries)/scale)**2,axis=1))
+		if round_==rounds-1 or len(live)<=keep:
+			break
+		#early rejection: the partial summaries of (round_+1)*knobs knobs scatter by about 1/sqrt(knobs) standard deviations of the data
+		threshold=np.partition(distance,keep-1)[keep-1]
+		survivors=distance-z/np.sqrt((round_+1)*knobs)<=threshold
+		live=live[survivors]
+
+	best=np.argsort(distance)[:keep]
+	accepted=live[best]
+	return {
+		'fractions':fractions[accepted],
+		'r_thresh':r_thresh[accepted],
+		'distance':distance[best],
+		'fractions_mean':fractions[accepted].mean(axis=0),
+		'fractions_std':fractions[accepted].std(axis=0),
+		'r_thresh_mean':r_thresh[accepted].mean(),
+		'r_thresh_std':r_thresh[accepted].std(),
+		'simulated_knobs':simulated,
+	}
@@ -0,0 +1,126 @@
+##############################################################################################################################################################################
+# Opt-in instrumentation of the placement: counters of proposals, acceptances, phi retries and too_small fallbacks per geometry, molecule count and ring section, and
+# timers of the stages of a knob simulation. It is switched on with enable() or the environment variable PFEMP1_INSTRUMENT=1 (which also reaches the workers of a
+# process pool). When it is off, the hot paths only check the flag "enabled" once per ring section or stage.
+# Counted per ring section:
+#     proposals        thetas drawn (one candidate position each)
+#     acceptances      molecules placed
+#     retries          candidates that overlapped and started the loop of up to 100 additional phi trials
+#     retry_proposals  phi trials in these loops
+#     fallbacks        ring sections in which the density was too high and overlap was allowed (too_small), or that were jammed (placement='free')
+#     unchecked        molecules placed after a fallback, for which an overlap is allowed
+##############################################################################################################################################################################
+
+import csv
+import json
+import os
+import time
+
+import numpy as np
+
+fields=('proposals','acceptances','retries','retry_proposals','fallbacks','unchecked')
+column={name:i for i,name in enumerate(fields)}
+
+enabled=os.environ.get('PFEMP1_INSTRUMENT','0') not in ('','0')
+counters={} #(geometry, molecules, ring) -> counts in the order of fields
+timers={} #stage -> [calls, seconds]
+context=[None,None,None] #geometry, molecules and ring section that are counted
+
+def enable(flag=True):
+	global enabled
+	enabled=flag
+	os.environ['PFEMP1_INSTRUMENT']='1' if flag else '0'
+
+def reset():
+	counters.clear()
+	timers.clear()
+
+#add counts to the ring section of the current context (or to the given ring)
+def count(ring=None,**increments):
+	key=(context[0],context[1],context[2] if ring is None else ring)
+	row=counters.get(key)
+	if row is None:
+		row=counters[key]=np.zeros(len(fields),dtype=np.int64)
+	for name,value in increments.items():
+		row[column[name]]+=value
+
+#add one count (or the given weights) to the field for every entry of an array of ring indices, e.g. count_rings('proposals',rings[pending])
+def count_rings(name,rings,weights=None):
+	rings=np.asarray(rings,dtype=np.int64).ravel()
+	if len(rings)==0:
+		return
+	for ring,n in enumerate(np.bincount(rings,weights)):
+		if n:
+			count(ring,**{name:int(n)})
+
+#context manager that adds the time of a stage (e.g. 'sample', 'placement', 'neighbours') if the instrumentation is on
+class stage:
+
+	def __init__(self,name):
+		self.name=name
+
+	def __enter__(self):
+		if enabled:
+			self.start=time.perf_counter()
+		return self
+
+	def __exit__(self,*exc):
+		if enabled:
+			timer=timers.setdefault(self.name,[0,0.0])
+			timer[0]+=1
+			timer[1]+=time.perf_counter()-self.start
+
+#placement function with the signature of uniform_in_sector that counts into the ring section it is called for and times the stage 'placement'
+def instrumented_placement(place,geometry,molecules,thetas):
+	rings={theta:i for i,theta in enumerate(thetas[:-1])}
+	def instrumented(theta_0_real,theta_1_real,n,R,r_thresh,already_existing_points,rng):
+		context[:]=[geometry,molecules,rings.get(theta_0_real)]
+		with stage('placement'):
+			return place(theta_0_real,theta_1_real,n,R,r_thresh,already_existing_points,rng)
+	return instrumented
+
+#counters and timers of this process, e.g. to send them from a worker to the main process
+def snapshot():
+	return {'counters':{key:row.copy() for key,row in counters.items()},'timers':{name:list(timer) for name,timer in timers.items()}}
+
+def merge(other):
+	for key,row in other['counters'].items():
+		if key in counters:
+			counters[key]+=row
+		else:
+			counters[key]=row.copy()
+	for name,(calls,seconds) in other['timers'].items():
+		timer=timers.setdefault(name,[0,0.0])
+		timer[0]+=calls
+		timer[1]+=seconds
+
+#run f(*args) in a worker with fresh counters and return its result together with the counters
+def measured(f,*args):
+	enable()
+	reset()
+	result=f(*args)
+	return result,snapshot()
+
+#report as dict: one row per geometry, molecule count and ring section, totals per molecule count and the stage timers
+def report():
+	rows=[]
+	totals={}
+	for (geometry,molecules,ring),row in sorted(counters.items(),key=lambda item:(str(item[0][0]),item[0][1] or 0,-1 if item[0][2] is None else item[0][2])):
+		rows.append(dict(zip(fields,row.tolist()),geometry=geometry,molecules=molecules,ring=ring))
+		total=totals.setdefault('%s-%s' % (geometry,molecules),np.zeros(len(fields),dtype=np.int64))
+		total+=row
+	return {
+		'rings':rows,
+		'molecules':{key:dict(zip(fields,total.tolist())) for key,total in totals.items()},
+		'stages':{name:{'calls':calls,'seconds':seconds} for name,(calls,seconds) in timers.items()},
+	}
+
+#write the report next to the distance output: base+'.instrumentation.json' and the counters per ring section as base+'.instrumentation.csv'
+def write_report(base):
+	data=report()
+	with open(base+'.instrumentation.json','w') as f:
+		json.dump(data,f,indent=1,sort_keys=True)
+	with open(base+'.instrumentation.csv','w',newline='') as f:
+		writer=csv.DictWriter(f,('geometry','molecules','ring')+fields)
+		writer.writeheader()
+		writer.writerows(data['rings'])
@@ -0,0 +1,144 @@
+##############################################################################################################################################################################
+# Compiled kernels for the scalar distance functions of knob.py (distance, distance_polar, distance_polar_large_enough) and the nearest neighbor loop.
+# If numba is installed, the loops below are compiled on first use and the machine code is cached in __pycache__ (cache=True), so later processes and pool workers
+# only load it; otherwise (or with backend 'numpy') the same arithmetic is evaluated with vectorized NumPy.
+# The backend is chosen with use() or the environment variable PFEMP1_BACKEND ('auto', 'numba' or 'numpy'; 'auto' takes numba if it is available).
+# Both backends evaluate the formulas of knob.py in the same order, so a simulation with a fixed seed places the same molecules and gives the same distances up to
+# the last bits of the math library (see parity()).
+##############################################################################################################################################################################
+
+import importlib.util
+import os
+import types
+
+import numpy as np
+
+#numba is only imported when the numba backend is used, since the import alone takes a fraction of a second
+numba_available=importlib.util.find_spec('numba') is not None
+
+backend=None
+compiled={}
+
+#Calculate the distance between two points on the surface of the sphere (distance() in knob.py)
+def distance_kernel(x1,y1,z1,x2,y2,z2,r):
+	d=np.sqrt(np.power(x1-x2,2)+np.power(y1-y2,2)+np.power(z1-z2,2))
+	return r*np.arcsin(d*np.sqrt(4.0*np.power(r,2)-np.power(d,2))*0.5/np.power(r,2))
+
+#Calculate the distance between two points on the surface of the sphere given by their angles (distance_polar() in knob.py)
+def distance_polar_kernel(th1,phi1,th2,phi2,R):
+	x1=R*np.cos(th1)*np.cos(phi1)
+	y1=R*np.cos(th1)*np.sin(phi1)
+	z1=R*np.sin(th1)
+	x2=R*np.cos(th2)*np.cos(phi2)
+	y2=R*np.cos(th2)*np.sin(phi2)
+	z2=R*np.sin(th2)
+	return distance_kernel(x1,y1,z1,x2,y2,z2,R)
+
+#True if the point (theta,phi) keeps the distance 2*r_thresh to all valid points (theta>=0) of the 2 x M angle array (distance_polar_large_enough() in knob.py)
+def large_enough_loop(theta,phi,R,angles,r_thresh):
+	for i in range(angles.shape[1]):
+		if angles[0,i]>=0:
+			d=distance_polar_kernel(theta,phi,angles[0,i],angles[1,i],R)
+		else:
+			d=100.0
+		if d<2*r_thresh:
+			return False
+	return True
+
+#nearest neighbor distances for the (N,3) array of Cartesian points on the sphere of radius R and their unit vectors; the nearest neighbor is the point with the
+#largest |cos(alpha)|, like in neighbours.py
+def nearest_neighbour_loop(points,units,R):
+	N=points.shape[0]
+	distances=np.empty(N)
+	for i in range(N):
+		best=-1
+		largest=-np.inf
+		for j in range(N):
+			if j!=i:
+				c=abs(units[i,0]*units[j,0]+units[i,1]*units[j,1]+units[i,2]*units[j,2])
+				if c>largest:
+					largest=c
+					best=j
+		distances[i]=distance_kernel(points[i,0],points[i,1],points[i,2],points[best,0],points[best,1],points[best,2],R)
+	return distances
+
+#same checks with NumPy arrays
+def large_enough_numpy(theta,phi,R,angles,r_thresh):
+	d=distance_polar_kernel(theta,phi,angles[0],angles[1],R)
+	d=np.where(angles[0]>=0,d,100.0)
+	return not np.any(d<2*r_thresh)
+
+def nearest_neighbour_numpy(points,units,R):
+	c=np.abs(units@units.T)
+	np.fill_diagonal(c,-np.inf)
+	nearest=points[np.argmax(c,axis=1)]
+	return distance_kernel(points[:,0],points[:,1],points[:,2],nearest[:,0],nearest[:,1],nearest[:,2],R)
+
+#select the backend ('auto', 'numba' or 'numpy'), returns the name of the backend that is used
+def use(name='auto'):
+	global backend
+	if name=='auto':
+		name='numba' if numba_available else 'numpy'
+	if name=='numba' and not numba_available:
+		raise ImportError("backend 'numba' requires numba")
+	if name not in ('numba','numpy'):
+		raise ValueError("unknown backend: %s" % name)
+	backend=name
+	return backend
+
+def active():
+	if backend is None:
+		use(os.environ.get('PFEMP1_BACKEND','auto'))
+	return backend
+
+#numba versions of the loops, compiled on first use. They are compiled from the functions above with a namespace in which the kernels they call are the
+#compiled versions as well, so the NumPy backend keeps the plain Python functions.
+def kernel(name):
+	if not compiled:
+		import numba
+		namespace=dict(globals())
+		for f in (distance_kernel,distance_polar_kernel,large_enough_loop,nearest_neighbour_loop):
+			namespace[f.__name__]=compiled[f.__name__]=numba.njit(types.FunctionType(f.__code__,namespace,f.__name__),cache=True)
+	return compiled[name]
+
+#True if (theta,phi) keeps the minimal distance to the points of both 2 x M angle arrays, like distance_polar_large_enough(theta,phi,R,already_existing_points,
+#new_points,r_thresh) in knob.py
+def large_enough(theta,phi,R,already_existing_points,new_points,r_thresh):
+	check=kernel('large_enough_loop') if active()=='numba' else large_enough_numpy
+	for angles in (already_existing_points,new_points):
+		angles=np.asarray(angles,dtype=float).reshape(2,-1)
+		if angles.shape[1] and not check(float(theta),float(phi),float(R),angles,float(r_thresh)):
+			return False
+	return True
+
+#nearest neighbor distances (center to center) of the (N,3) array of Cartesian points on the sphere of radius R; their unit vectors can be passed in if they are
+#already known
+def nearest_neighbour_distances(points,R,units=None):
+	points=np.ascontiguousarray(points,dtype=float).reshape(-1,3)
+	if len(points)<2:
+		raise ValueError("at least two points are needed for nearest neighbor distances")
+	if units is None:
+		units=points/np.linalg.norm(points,axis=1)[:,np.newaxis]
+	if active()=='numba':
+		return kernel('nearest_neighbour_loop')(points,units,float(R))
+	return nearest_neighbour_numpy(points,units,R)
+
+#run the original loop placement (placement='loop') of generate_distances_AA with both backends and the same seed and compare the full arrays of distances; returns
+#the largest difference (nm), which is at rounding level if both backends placed the same molecules, inf if the arrays differ in shape (e.g. a different number
+#of placed molecules), and None if numba is not installed, so there is nothing to compare
+def parity(molecules=5,replicates=200,seed=0):
+	if not numba_available:
+		return None
+	from pfemp1.knob import generate_distances_AA, r_var
+	previous=backend
+	results=[]
+	try:
+		for name in ('numba','numpy'):
+			use(name)
+			rng=np.random.default_rng(seed)
+			results.append(np.array([generate_distances_AA(molecules,r_var,'loop',rng) for _ in range(replicates)]))
+	finally:
+		globals()['backend']=previous
+	if results[0].shape!=results[1].shape:
+		return np.inf
+	return float(np.max(np.abs(results[0]-results[1])))
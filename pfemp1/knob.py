@@ -0,0 +1,232 @@
+##############################################################################################################################################################################
+# Simulation of a single idealized knob: disc like molecules are distributed on the surface of a half-sphere according to a given distribution and the nearest neighbor
+# distances (measured as surface-to-surface distance) are calculated. Used by average-distance.py.
+# Note definition of theta and phi: theta is the polar angle which is 0 when pointing along the x-axis and pi/2 along the z-axis. phi is the azimuthal angle (0 to 2 pi).
+# All random numbers are drawn from the numpy Generator rng that is passed in, so every replicate can get its own reproducible stream.
+##############################################################################################################################################################################
+
+import os
+
+import numpy as np
+
+from pfemp1.placement import uniform_in_sector_batch, indexed_placement, section_bounds
+from pfemp1.freearea import free_area_placement
+from pfemp1.neighbours import unit_nearest_neighbour_distances
+from pfemp1.pointstore import PointStore
+from pfemp1.kernels import large_enough
+from pfemp1 import instrumentation
+
+percentage_in_each_section_AA=[0.047076342223133109, 0.17041750404891309, 0.14288596678141868, 0.3429168902432384, 0.2967032967032967]
+percentage_in_each_section_AS=[0.03638455687749774, 0.061833159380116055, 0.18647013167014589, 0.25457432455680268, 0.21226516051360983, 0.097094298202712412, 0.15137836879911531]
+r_var=np.sqrt(110/np.pi)
+
+#radii of the idealized knobs and the polar angles that limit their ring sections
+R_AA=79.206/2.0
+R_AS=108.289/2.0
+thetas_AA=[np.arccos(a) for a in [0,0.2,0.4,0.6,0.8,1]]
+thetas_AS=[np.arccos(a/7.0) for a in range(8)]
+
+seed=20180704 #master seed of the simulations, each run derives its own random streams from it (see pfemp1/parallel.py)
+workers=os.cpu_count() #processes of the pools of the drivers
+
+class Geometry:
+
+	#knob of radius R (nm) whose ring sections are limited by the polar angles thetas and hold the given fractions of the molecules
+	def __init__(self,name,R,thetas,distribution):
+		if len(thetas)!=len(distribution)+1:
+			raise ValueError("%s: %d ring sections need %d angles, got %d" % (name,len(distribution),len(distribution)+1,len(thetas)))
+		self.name=name
+		self.R=float(R)
+		self.thetas=[float(theta) for theta in thetas]
+		self.distribution=[float(p) for p in distribution]
+		self.bounds=section_bounds(self.thetas)
+
+	#area of the knob surface (half-sphere)
+	def area(self):
+		return 2*np.pi*self.R**2
+
+#knob with the section table of the fractions and rings of equal height (like the AA and AS knob), unless the angles are given
+def custom_geometry(name,R,distribution,thetas=None):
+	if thetas is None:
+		thetas=[np.arccos(a/float(len(distribution))) for a in range(len(distribution)+1)]
+	return Geometry(name,R,thetas,distribution)
+
+geometries={
+	'AA':Geometry('AA',R_AA,thetas_AA,percentage_in_each_section_AA),
+	'AS':Geometry('AS',R_AS,thetas_AS,percentage_in_each_section_AS),
+}
+
+#Calculate the distance between two points on the surface of the sphere
+def distance_polar(th1,phi1,th2,phi2,R):
+	x1=R*np.cos(th1)*np.cos(phi1)
+	y1=R*np.cos(th1)*np.sin(phi1)
+	z1=R*np.sin(th1)
+	x2=R*np.cos(th2)*np.cos(phi2)
+	y2=R*np.cos(th2)*np.sin(phi2)
+	z2=R*np.sin(th2)
+	return distance(x1,y1,z1,x2,y2,z2,R)
+	#return R*np.sqrt(2.0-2.0*np.cos(th1)*np.cos(th2)*np.cos(phi1-phi2)-2.0*np.sin(th1)*np.sin(th2))
+
+#Calculate the distance between two points on the surface of the sphere
+def distance(x1,y1,z1,x2,y2,z2,r):
+	d=np.sqrt(np.power(x1-x2,2)+np.power(y1-y2,2)+np.power(z1-z2,2))
+	return r*np.arcsin(d*np.sqrt(4.0*np.power(r,2)-np.power(d,2))*0.5/np.power(r,2))
+
+#When placing a new point, the distance to all previously placed points is calculated and checked if it lies above a given threshold value.
+#uniform_in_sector uses the compiled or vectorized version large_enough (pfemp1/kernels.py), which gives the same result.
+def distance_polar_large_enough(theta,phi,R,already_existing_points,new_points,r_thresh):
+	#look at previously generated points
+	for i in range(len(already_existing_points[0])):
+		if already_existing_points[0][i]>=0:
+			d=distance_polar(theta,phi,already_existing_points[0][i],already_existing_points[1][i],R)
+		else:	
+			d=100
+		if d<2*r_thresh:
+			return False
+	#look at points generated in the same ring section
+	for i in range(len(new_points[0])):
+		if new_points[0][i]>=0:
+			d=distance_polar(theta,phi,new_points[0][i],new_points[1][i],R)
+		else:	
+			d=100
+		if d<2*r_thresh:
+			return False
+	return True
+
+#Given two angles, n particles are distributed uniformly on the ring section that is limited by the two angles. Additionally, points can only be placed if they are far enough form all other points (no overlap of disc like particles). In the rare case that the density is to large to place the particles without overlap, the overlap is allowed. 
+def uniform_in_sector(theta_0_real,theta_1_real,n,R,r_thresh,already_existing_points,rng):
+
+	theta_0=np.pi-theta_0_real #conversion to a different definition of theta
+	theta_1=np.pi-theta_1_real
+
+	x_0=(1.0-np.cos(theta_0))/2.0
+	x_1=(1.0-np.cos(theta_1))/2.0
+
+	uniform_on_sphere=np.empty((2,n))
+	points=0
+	count=0
+	too_small=False
+	counting=instrumentation.enabled #the counters for pfemp1/instrumentation.py are only updated if it is switched on
+	proposals=0
+	retried=0
+	retry_proposals=0
+	unchecked=0
+
+	#make sure n points are generated for the given ring section
+	while points < n:
+		phi=2*np.pi*(rng.random())
+		theta=np.pi-np.arccos(1.0-2.0*(x_0+rng.random()*(x_1-x_0)))
+		if counting:
+			proposals+=1
+		if large_enough(theta,phi,R,already_existing_points,uniform_on_sphere[:,:points],r_thresh) or too_small:
+			uniform_on_sphere[0][points]=theta 
+			uniform_on_sphere[1][points]=phi 
+			points+=1
+			count=0
+			if counting:
+				unchecked+=too_small
+
+		else:   #try to find another phi placement that does not produce an overlap
+			for i in range(100):
+				phi=2*np.pi*(rng.random())
+				if large_enough(theta,phi,R,already_existing_points,uniform_on_sphere[:,:points],r_thresh):
+					uniform_on_sphere[0][points]=theta 
+					uniform_on_sphere[1][points]=phi 
+					points+=1
+					count=0
+					break
+			if counting:
+				retried+=1
+				retry_proposals+=i+1
+		count+=1
+
+		#this is executed if the density is too high to prevent overlap
+		if count>100:
+			too_small=True
+
+	if instrumentation.enabled:
+		instrumentation.count(proposals=proposals,acceptances=n,retries=retried,retry_proposals=retry_proposals,fallbacks=too_small,unchecked=unchecked)
+	return uniform_on_sphere
+
+#generate a random placement of "number" particles accoring to the given "distribution"
+def generate_sample(number,distribution,rng):
+	sector_occupation=[0 for i in distribution]
+	while sum(sector_occupation)<number:
+		x=rng.integers(0, len(distribution))
+		if rng.random()<distribution[x]:
+			sector_occupation[x]+=1
+	return sector_occupation 
+
+#given the number of PfEMP1 particles these are placed (without overlap) on the surface of an idealized AS knob (half-sphere) and the nearest neighbor distances are calculated
+#(R can be changed for knobs of other sizes with the same ring sections, see pfemp1/erythrocyte.py)
+def generate_distances_AS(N_pf,r_thresh,placement='batch',rng=None,R=R_AS):
+	thetas=thetas_AS
+
+	if rng is None:
+		rng=np.random.default_rng()
+
+	#placement='batch' uses the vectorized sampler, placement='index' additionally a spatial cell index of the knob, placement='free' samples only from the free area
+	#of the ring sections (pfemp1/freearea.py), placement='loop' the original per-candidate rejection loop
+	if placement=='index':
+		place=indexed_placement(R,r_thresh)
+	elif placement=='free':
+		place=free_area_placement(R,r_thresh)
+	elif placement=='batch':
+		place=uniform_in_sector_batch
+	else:
+		place=uniform_in_sector
+
+	if instrumentation.enabled:
+		place=instrumentation.instrumented_placement(place,'AS',N_pf,thetas)
+
+	with instrumentation.stage('sample'):
+		numbers=generate_sample(N_pf,percentage_in_each_section_AS,rng)
+
+	#the molecules are placed ring section by ring section into one preallocated store (pfemp1/pointstore.py); the placement of a ring section reads the points
+	#of the previous ones from it and the nearest neighbor stage reads its unit vectors
+	store=PointStore(N_pf)
+	for ring in range(len(thetas)-1):
+		store.append(place(thetas[ring],thetas[ring+1],numbers[ring],R,r_thresh,store.angles(),rng))
+
+	#record the nearest neighbor distances of the packed coordinates. 2.0*r_thresh is subtracted because we are interested in the surface to surface distance
+	with instrumentation.stage('neighbours'):
+		distances=unit_nearest_neighbour_distances(store.units(),R)-2.0*r_thresh
+	return distances.tolist()
+
+#given the number of PfEMP1 particles these are placed (without overlap) on the surface of an idealized AA knob (half-sphere) and the nearest neighbor distances are calculated
+#(R can be changed for knobs of other sizes with the same ring sections, see pfemp1/erythrocyte.py)
+def generate_distances_AA(N_pf,r_thresh,placement='batch',rng=None,R=R_AA):
+	thetas=thetas_AA
+
+	if rng is None:
+		rng=np.random.default_rng()
+
+	#placement='batch' uses the vectorized sampler, placement='index' additionally a spatial cell index of the knob, placement='free' samples only from the free area
+	#of the ring sections (pfemp1/freearea.py), placement='loop' the original per-candidate rejection loop
+	if placement=='index':
+		place=indexed_placement(R,r_thresh)
+	elif placement=='free':
+		place=free_area_placement(R,r_thresh)
+	elif placement=='batch':
+		place=uniform_in_sector_batch
+	else:
+		place=uniform_in_sector
+
+	if instrumentation.enabled:
+		place=instrumentation.instrumented_placement(place,'AA',N_pf,thetas)
+
+	with instrumentation.stage('sample'):
+		numbers=generate_sample(N_pf,percentage_in_each_section_AA,rng)
+
+	#the molecules are placed ring section by ring section into one preallocated store (pfemp1/pointstore.py); the placement of a ring section reads the points
+	#of the previous ones from it and the nearest neighbor stage reads its unit vectors
+	store=PointStore(N_pf)
+	for ring in range(len(thetas)-1):
+		store.append(place(thetas[ring],thetas[ring+1],numbers[ring],R,r_thresh,store.angles(),rng))
+
+	#record the nearest neighbor distances of the packed coordinates. 2.0*r_thresh is subtracted because we are interested in the surface to surface distance
+	with instrumentation.stage('neighbours'):
+		distances=unit_nearest_neighbour_distances(store.units(),R)-2.0*r_thresh
+	return distances.tolist()
+
+#the distances of all pairs instead of the nearest neighbors are counted by pfemp1/pair_correlation.py
@@ -0,0 +1,76 @@
+##############################################################################################################################################################################
+# Nearest neighbor stage: for every point on the knob the distance to its nearest neighbor is determined from a packed (N,3) array of Cartesian coordinates.
+# For small N the full matrix of dot products of the unit vectors is used, for large N a KD-tree on the chord distance. Only the distances to the winners are converted
+# to distances on the surface, with the formula of distance() in knob.py. That formula folds angles above pi/2 (see geometry.overlap_cos), so the nearest
+# neighbor is the point with the largest |cos(alpha)| and the KD-tree is also queried with the antipodes.
+##############################################################################################################################################################################
+
+import functools
+
+import numpy as np
+
+from pfemp1.geometry import surface_distance
+from pfemp1 import kernels
+
+tree_above=400 #number of points above which the KD-tree is used (if scipy is available)
+#number of points above which the numba loop is used instead of the matrix (if the numba backend is active). Below, the matrix costs a few 10 microseconds per knob,
+#which does not pay for importing numba and loading the compiled loop (about 0.5 s per process); at 200 points the loop takes 0.09 ms and the matrix 0.11-0.3 ms.
+kernel_above=100
+
+#KD-tree class of scipy (None if scipy is not installed), imported on first use
+@functools.lru_cache(maxsize=None)
+def kd_tree():
+	try:
+		from scipy.spatial import cKDTree
+	except ImportError:
+		return None
+	return cKDTree
+
+#index of the nearest neighbor of every point from the matrix of dot products
+def nearest_neighbours_dense(units):
+	c=np.abs(units@units.T)
+	np.fill_diagonal(c,-np.inf)
+	return np.argmax(c,axis=1)
+
+#index of the nearest neighbor of every point from a KD-tree. The closest other point and the point closest to the antipode are candidates, the one with the
+#smaller folded distance wins
+def nearest_neighbours_tree(units):
+	tree=kd_tree()(units)
+	_,direct=tree.query(units,k=2)
+	direct=direct[:,1]
+	_,antipodal=tree.query(-units,k=1)
+	closer=np.abs(np.einsum('ij,ij->i',units,units[antipodal]))>np.abs(np.einsum('ij,ij->i',units,units[direct]))
+	closer&=antipodal!=np.arange(len(units))
+	return np.where(closer,antipodal,direct)
+
+#nearest neighbor distances (center to center) of the points given as (N,3) array of Cartesian coordinates on the sphere of radius R.
+#method='dense' uses the dot product matrix, method='tree' the KD-tree, method='kernel' the nearest neighbor loop of pfemp1/kernels.py. method='auto' chooses according
+#to the number of points: the matrix up to kernel_above points, the loop up to tree_above points if the numba backend is active, and the KD-tree above.
+def nearest_neighbour_distances(points,R,method='auto'):
+	points=np.asarray(points,dtype=float).reshape(-1,3)
+	if len(points)<2:
+		raise ValueError("at least two points are needed for nearest neighbor distances")
+	return unit_nearest_neighbour_distances(points/np.linalg.norm(points,axis=1)[:,np.newaxis],R,method,points)
+
+#same for the (N,3) array of unit vectors, e.g. the view of a PointStore (pfemp1/pointstore.py); the Cartesian points are R*units unless they are given
+def unit_nearest_neighbour_distances(units,R,method='auto',points=None):
+	if len(units)<2:
+		raise ValueError("at least two points are needed for nearest neighbor distances")
+	if points is None:
+		points=R*units
+	if method=='auto':
+		if len(units)>tree_above and kd_tree() is not None:
+			method='tree'
+		elif len(units)>kernel_above and kernels.active()=='numba':
+			method='kernel'
+		else:
+			method='dense'
+	if method=='kernel':
+		return kernels.nearest_neighbour_distances(points,R,units)
+	if method=='tree':
+		if kd_tree() is None:
+			raise ImportError("method='tree' requires scipy")
+		nearest=nearest_neighbours_tree(units)
+	else:
+		nearest=nearest_neighbours_dense(units)
+	return surface_distance(points,points[nearest],R)
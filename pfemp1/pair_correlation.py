@@ -0,0 +1,161 @@
+##############################################################################################################################################################################
+# Geodesic pair correlation function g(s) of the molecules on the knob surface.
+# All pairs of molecules of a knob are counted in a histogram with fixed bins of the geodesic distance s=R*alpha between their centers (alpha is the angle between the
+# two points, not folded back at pi/2 like in distance() of knob.py). Knobs are simulated in chunks with the ensemble engine and only the bin counts of a chunk are
+# kept, so the memory does not depend on the number of knobs or pairs.
+# g(s) is the fraction of pairs in a bin divided by the fraction for a reference of independent points: with the default reference 'uniform' they are distributed
+# uniformly in area over the knob surface, so g(s) also shows the concentration of the molecules in some ring sections; with reference 'sections' the points are
+# distributed over the ring sections like the molecules, but without exclusion (g(s)=1 means no correlation beyond the section distribution).
+# g(s)<1 below 2 r_thresh comes from the excluded discs, g(s)>1 at small s would indicate clustering.
+##############################################################################################################################################################################
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from pfemp1.geometry import unit_vectors
+from pfemp1.knob import r_var, R_AA, R_AS, thetas_AA, thetas_AS, percentage_in_each_section_AA, percentage_in_each_section_AS, seed, workers
+from pfemp1.ensemble import place_ensemble
+from pfemp1.placement import draw_candidates, section_bounds
+from pfemp1.parallel import iter_replicates, replicate_chunks, seed_for
+from pfemp1 import instrumentation
+
+bins=90 #bins between 0 and the largest geodesic distance on the half-sphere, pi*R
+reference_pairs=10**7 #independent pairs drawn for the reference histogram
+reference_block=10**6 #pairs drawn at once
+reference_seed=20180705
+
+#fixed bin edges of the geodesic distance for a knob of radius R
+def pair_edges(R,bins=bins):
+	return np.linspace(0.0,np.pi*R,bins+1)
+
+#bin counts of the geodesic distances s (equally spaced edges); values on the last edge belong to the last bin
+def count_distances(s,edges):
+	n=len(edges)-1
+	i=np.minimum(((np.asarray(s)-edges[0])*(n/(edges[-1]-edges[0]))).astype(np.int64),n-1)
+	return np.bincount(i.ravel(),minlength=n)
+
+#bin counts of the distances of all pairs within each knob, for unit vectors of shape (K,N,3)
+def pair_counts(units,R,edges):
+	i,j=np.triu_indices(units.shape[1],1)
+	c=np.einsum('kij,klj->kil',units,units)[:,i,j]
+	return count_distances(R*np.arccos(np.clip(c,-1.0,1.0)),edges)
+
+#K knobs with N_pf molecules each, returns the bin counts of the pair distances of all knobs (signature for iter_replicates with ensemble=True). With the same rng
+#the molecules are placed like in ensemble_distances, so the pair histogram and the nearest neighbor distances of a seed belong to the same knobs.
+def ensemble_pair_counts(K,N_pf,r_thresh,R,thetas,distribution,edges,geometry=None,rng=None):
+	if rng is None:
+		rng=np.random.default_rng()
+	with instrumentation.stage('placement'):
+		units=place_ensemble(K,N_pf,r_thresh,R,thetas,distribution,rng,geometry=geometry)
+	with instrumentation.stage('pairs'):
+		return pair_counts(units,R,edges)
+
+#k independent points of the reference: 'sections' draws the rings from the section distribution and places the points within a ring like the simulation
+#(draw_candidates, uniform in the distance from the knob axis); 'uniform' places them uniformly in area over the knob (the height z=sin(theta) is uniform)
+def reference_points(k,thetas,distribution,reference,rng):
+	if reference=='sections':
+		cdf=np.cumsum(np.asarray(distribution,dtype=float))
+		cdf/=cdf[-1]
+		bounds=section_bounds(thetas)
+		rings=np.minimum(np.searchsorted(cdf,rng.random(k),side='right'),len(cdf)-1)
+		return unit_vectors(*draw_candidates(bounds[rings,0],bounds[rings,1],k,rng))
+	if reference=='uniform':
+		z=np.sin(np.asarray(thetas,dtype=float))
+		phi=2*np.pi*rng.random(k)
+		return unit_vectors(np.arcsin(z.min()+rng.random(k)*(z.max()-z.min())),phi)
+	raise ValueError("unknown reference: %s (use 'sections' or 'uniform')" % reference)
+
+#bin counts of the distances of independent pairs of points (no exclusion)
+def reference_counts(R,thetas,distribution,edges,reference='uniform',pairs=reference_pairs,rng=None):
+	if rng is None:
+		rng=np.random.default_rng(reference_seed)
+	counts=np.zeros(len(edges)-1,dtype=np.int64)
+	for start in range(0,pairs,reference_block):
+		k=min(reference_block,pairs-start)
+		u=reference_points(k,thetas,distribution,reference,rng)
+		v=reference_points(k,thetas,distribution,reference,rng)
+		counts+=count_distances(R*np.arccos(np.clip(np.einsum('ij,ij->i',u,v),-1.0,1.0)),edges)
+	return counts
+
+#g(s) from the bin counts of the simulation and of the reference; bins that the reference does not reach are nan
+def pair_correlation(counts,reference):
+	counts=np.asarray(counts,dtype=float)
+	reference=np.asarray(reference,dtype=float)
+	with np.errstate(divide='ignore',invalid='ignore'):
+		return np.where(reference>0,(counts/counts.sum())/(reference/reference.sum()),np.nan)
+
+class PairHistogram:
+
+	#pair counts of a simulation with the bin edges, the molecules per knob and the number of knobs; g() normalizes against the reference counts of the same bins
+	def __init__(self,edges,molecules,counts=None,knobs=0):
+		self.edges=np.asarray(edges,dtype=float)
+		self.molecules=molecules
+		self.counts=np.zeros(len(self.edges)-1,dtype=np.int64) if counts is None else np.asarray(counts,dtype=np.int64)
+		self.knobs=knobs
+
+	def add(self,counts,knobs=0):
+		self.counts+=np.asarray(counts,dtype=np.int64)
+		self.knobs+=knobs
+
+	def merge(self,other):
+		self.add(other.counts,other.knobs)
+
+	def pairs(self):
+		return int(self.counts.sum())
+
+	def centers(self):
+		return 0.5*(self.edges[1:]+self.edges[:-1])
+
+	def g(self,reference):
+		return pair_correlation(self.counts,reference)
+
+#pair histogram of N knobs with the given number of molecules (on the pool, if given). The chunks and their seeds are the ones of routine_AA, so the result does not
+#depend on the number of workers and the knobs are the same as in the nearest neighbor run with the same seed.
+def pair_histogram(N,molecules,r_thresh,R,thetas,distribution,geometry=None,seed=seed,pool=None,edges=None):
+	if edges is None:
+		edges=pair_edges(R)
+	histogram=PairHistogram(edges,molecules)
+	for replicates,counts in zip(replicate_chunks(N),iter_replicates(ensemble_pair_counts,N,(molecules,r_thresh,R,thetas,distribution,edges,geometry),
+			seed_for(seed,molecules),pool,ensemble=True)):
+		histogram.add(counts,replicates)
+	return histogram
+
+def pair_histogram_AA(N,molecules,r_thresh=r_var,seed=seed,pool=None):
+	return pair_histogram(N,molecules,r_thresh,R_AA,thetas_AA,percentage_in_each_section_AA,'AA',seed,pool)
+
+def pair_histogram_AS(N,molecules,r_thresh=r_var,seed=seed,pool=None):
+	return pair_histogram(N,molecules,r_thresh,R_AS,thetas_AS,percentage_in_each_section_AS,'AS',seed,pool)
+
+#g(s) of the AA knob for 2 to 10 molecules against the uniform reference, written to pair_correlation_AA.npz (edges, pair counts per molecule count, reference
+#counts for both references, g against the uniform and against the section reference). With plot=True, g(s) of 3, 5, 7 and 9 molecules is drawn to
+#pair_correlation.png.
+def main(plot=True,knobs=100000):
+	edges=pair_edges(R_AA)
+	reference=reference_counts(R_AA,thetas_AA,percentage_in_each_section_AA,edges)
+	sections=reference_counts(R_AA,thetas_AA,percentage_in_each_section_AA,edges,'sections')
+	with ProcessPoolExecutor(workers) as pool:
+		histograms=[pair_histogram_AA(knobs,molecules,pool=pool) for molecules in range(2,11)]
+	np.savez("pair_correlation_AA.npz",edges=edges,molecules=np.arange(2,11),counts=np.array([h.counts for h in histograms]),reference=reference,sections=sections,
+		g=np.array([h.g(reference) for h in histograms]),g_sections=np.array([h.g(sections) for h in histograms]))
+	for molecules,h in zip(range(2,11),histograms):
+		g=h.g(reference)
+		contact=np.searchsorted(h.edges,2*r_var) #first bin that starts at or above the contact distance 2 r_thresh
+		print("%d molecules: %d pairs, g(s) below contact %.3f, at contact %.3f (section reference: %.3f)" % (molecules,h.pairs(),np.nanmean(g[:contact-1]),g[contact],
+			h.g(sections)[contact]))
+	if plot:
+		plot_pair_correlation(histograms[1:9:2],reference)
+	return histograms,reference
+
+def plot_pair_correlation(histograms,reference):
+	import matplotlib.pyplot as plt
+
+	for h in histograms:
+		plt.plot(h.centers(),h.g(reference),label='%d molecules' % h.molecules)
+	plt.axhline(1.0,color='gray',linewidth=0.5)
+	plt.axvline(2*r_var,color='gray',linestyle='--',linewidth=0.5)
+	plt.legend()
+	plt.xlabel('geodesic distance s (nm)')
+	plt.ylabel('pair correlation g(s)')
+	plt.savefig('pair_correlation.png')
+	plt.close()
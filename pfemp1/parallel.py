@@ -0,0 +1,77 @@
+##############################################################################################################################################################################
+# Execution of independent knob replicates on a process pool.
+# The replicates are split into chunks of fixed size and every chunk gets its own random stream, derived from one master seed with numpy's SeedSequence. Since neither
+# the chunks nor their seeds depend on the number of workers, the results are bit-identical for any pool size (including no pool at all).
+##############################################################################################################################################################################
+
+import collections
+
+import numpy as np
+
+from pfemp1 import instrumentation
+
+chunk_size=500 #replicates per chunk
+
+#seed sequence for one run, e.g. seed_for(master_seed,molecules) gives every molecule count an independent stream
+def seed_for(seed,*key):
+	return np.random.SeedSequence(seed,spawn_key=tuple(int(i) for i in key))
+
+#sizes of the chunks the N replicates are split into
+def replicate_chunks(N,size=chunk_size):
+	return [min(size,N-start) for start in range(0,N,size)]
+
+#run one chunk of replicates of simulate(*args,rng=rng) and return all values in order. With ensemble=True, simulate(replicates,*args,rng=rng) simulates the
+#whole chunk at once and returns an array with one row per replicate (see ensemble.py)
+def run_chunk(simulate,replicates,args,seed,ensemble=False):
+	rng=np.random.default_rng(seed)
+	if ensemble:
+		return simulate(replicates,*args,rng=rng).ravel().tolist()
+	values=[]
+	for i in range(replicates):
+		values.extend(simulate(*args,rng=rng))
+	return values
+
+#yield the values of the chunks of N replicates of simulate(*args,rng=rng) in a fixed order, one list per chunk. With pool=None everything runs in this process,
+#otherwise the chunks are submitted to the given concurrent.futures executor, at most window chunks at a time so finished results do not pile up in memory.
+#The first start chunks are skipped, which continues an interrupted run exactly (the random stream of a chunk only depends on its position).
+def iter_replicates(simulate,N,args,seed,pool=None,size=chunk_size,ensemble=False,window=64,start=0):
+	if not isinstance(seed,np.random.SeedSequence):
+		seed=np.random.SeedSequence(seed)
+	chunks=replicate_chunks(N,size)
+	seeds=seed.spawn(len(chunks))
+	chunks=chunks[start:]
+	seeds=seeds[start:]
+	if pool is None:
+		for replicates,s in zip(chunks,seeds):
+			yield run_chunk(simulate,replicates,args,s,ensemble)
+		return
+	#with instrumentation, the workers send their counters along with the values and they are added to the counters of this process
+	measured=instrumentation.enabled
+	def result(future):
+		if not measured:
+			return future.result()
+		values,counters=future.result()
+		instrumentation.merge(counters)
+		return values
+	pending=collections.deque()
+	try:
+		for replicates,s in zip(chunks,seeds):
+			if measured:
+				pending.append(pool.submit(instrumentation.measured,run_chunk,simulate,replicates,args,s,ensemble))
+			else:
+				pending.append(pool.submit(run_chunk,simulate,replicates,args,s,ensemble))
+			if len(pending)>=window:
+				yield result(pending.popleft())
+		while pending:
+			yield result(pending.popleft())
+	finally:
+		#chunks that are no longer needed (e.g. a converged adaptive run) are cancelled
+		for f in pending:
+			f.cancel()
+
+#run N replicates of simulate(*args,rng=rng), which has to return a list of values for one knob, and return the values of all replicates in a fixed order
+def run_replicates(simulate,N,args,seed,pool=None,size=chunk_size,ensemble=False):
+	values=[]
+	for chunk in iter_replicates(simulate,N,args,seed,pool,size,ensemble):
+		values.extend(chunk)
+	return values
@@ -0,0 +1,151 @@
+##############################################################################################################################################################################
+# Vectorized placement of disc like molecules in a ring section of the half-sphere.
+# The statistics are the same as for uniform_in_sector in knob.py (random sequential adsorption with up to 100 additional phi trials per theta and the
+# "too_small" overlap fallback), but candidates are drawn in blocks and compared to the accepted points with array operations instead of Python loops. One sampler
+# (sample_in_sector) serves both overlap checks: the linear scan over all points (LinearScan) and the spatial cell index (SphereCellIndex).
+##############################################################################################################################################################################
+
+import numpy as np
+
+from pfemp1.geometry import unit_vectors, overlap_cos
+from pfemp1.spatial_index import SphereCellIndex
+from pfemp1 import instrumentation
+
+#collect the unit vectors of all valid (theta>=0) points of a 2 x M angle array; columns with a negative theta (the -pi/2 placeholder for empty slots of older
+#callers) are skipped
+def existing_unit_vectors(already_existing_points):
+	angles=np.asarray(already_existing_points,dtype=float)
+	if angles.size==0:
+		return np.zeros((0,3))
+	angles=angles.reshape(2,-1)
+	valid=angles[0]>=0
+	return unit_vectors(angles[0][valid],angles[1][valid])
+
+#bounds of the uniformly distributed variable x=(1+cos(theta))/2 that is mapped to theta for the ring section limited by the two angles
+def ring_bounds(theta_0_real,theta_1_real):
+	theta_0=np.pi-theta_0_real #conversion to a different definition of theta
+	theta_1=np.pi-theta_1_real
+	return (1.0-np.cos(theta_0))/2.0,(1.0-np.cos(theta_1))/2.0
+
+#bounds of the variable that is mapped to theta for every ring section, shape (rings,2)
+def section_bounds(thetas):
+	return np.array([ring_bounds(thetas[i],thetas[i+1]) for i in range(len(thetas)-1)])
+
+#draw k candidate positions on the ring section like uniform_in_sector in knob.py: cos(theta), i.e. the distance from the knob axis, and phi are uniform. This is
+#not uniform in area (that would need a uniform sin(theta)), but it is the sampling of the original model.
+def draw_candidates(x_0,x_1,k,rng):
+	phi=2*np.pi*rng.random(k)
+	theta=np.pi-np.arccos(1.0-2.0*(x_0+rng.random(k)*(x_1-x_0)))
+	return theta,phi
+
+class LinearScan:
+
+	#overlap check against all stored points with one matrix product, with the interface of SphereCellIndex (free_mask, add, limit). existing are the unit vectors
+	#that are already placed, there is room for n more.
+	def __init__(self,existing,n,R,r_thresh):
+		self.limit=overlap_cos(R,2*r_thresh)
+		self.vectors=np.empty((len(existing)+n,3))
+		self.vectors[:len(existing)]=existing
+		self.size=len(existing)
+
+	def free_mask(self,us):
+		return np.all(np.abs(us@self.vectors[:self.size].T)<=self.limit,axis=1)
+
+	def add(self,us):
+		us=np.asarray(us,dtype=float).reshape(-1,3)
+		self.vectors[self.size:self.size+len(us)]=us
+		self.size+=len(us)
+
+#Placement of n particles in the ring section limited by the two angles (random sequential adsorption with up to retries additional phi trials per theta and the
+#"too_small" overlap fallback after max_failures failed thetas, like uniform_in_sector in knob.py). Candidates are drawn in blocks and checked with the overlap check
+#check (LinearScan or SphereCellIndex), to which the accepted points are added. Output in the 2 x n angle layout of uniform_in_sector.
+def sample_in_sector(theta_0_real,theta_1_real,n,check,rng,retries=100,max_failures=100):
+
+	x_0,x_1=ring_bounds(theta_0_real,theta_1_real)
+
+	uniform_on_sphere=np.empty((2,n))
+
+	points=0
+	count=0
+	too_small=False
+	counting=instrumentation.enabled #the counters for pfemp1/instrumentation.py are only updated if it is switched on
+	proposals=0
+	retried=0
+	retry_proposals=0
+	unchecked=0
+
+	while points<n:
+		#draw a block of candidates, one for each point that is still missing
+		k=n-points
+		theta,phi=draw_candidates(x_0,x_1,k,rng)
+		u=unit_vectors(theta,phi)
+		if too_small:
+			uniform_on_sphere[0][points:]=theta
+			uniform_on_sphere[1][points:]=phi
+			check.add(u)
+			if counting:
+				proposals+=k
+				unchecked+=k
+			break
+		free=check.free_mask(u)
+		if counting:
+			proposals+=k
+
+		for i in range(k):
+			if too_small:
+				uniform_on_sphere[0][points]=theta[i]
+				uniform_on_sphere[1][points]=phi[i]
+				check.add(u[i])
+				points+=1
+				if counting:
+					unchecked+=1
+				continue
+			if free[i]:
+				new=u[i]
+				new_phi=phi[i]
+			else:   #try to find another phi placement that does not produce an overlap
+				phis=2*np.pi*rng.random(retries)
+				v=unit_vectors(np.full(retries,theta[i]),phis)
+				valid=check.free_mask(v)
+				j=np.argmax(valid)
+				new=v[j] if valid[j] else None
+				new_phi=phis[j]
+				if counting:
+					retried+=1
+					retry_proposals+=j+1 if valid[j] else len(phis)
+			if new is not None:
+				uniform_on_sphere[0][points]=theta[i]
+				uniform_on_sphere[1][points]=new_phi
+				check.add(new)
+				points+=1
+				count=0
+				#the remaining candidates of the block also have to keep their distance to the new point
+				free[i+1:]&=np.abs(u[i+1:]@new)<=check.limit
+			count+=1
+
+			#this is executed if the density is too high to prevent overlap
+			if count>max_failures:
+				too_small=True
+
+	if instrumentation.enabled:
+		instrumentation.count(proposals=proposals,acceptances=n,retries=retried,retry_proposals=retry_proposals,fallbacks=too_small,unchecked=unchecked)
+	return uniform_on_sphere
+
+#Given two angles, n particles are distributed uniformly on the ring section that is limited by the two angles, without overlap of the discs. Input and output use the
+#2 x n angle layout of uniform_in_sector. In the rare case that the density is to large to place the particles without overlap, the overlap is allowed.
+def uniform_in_sector_batch(theta_0_real,theta_1_real,n,R,r_thresh,already_existing_points,rng,retries=100,max_failures=100):
+	check=LinearScan(existing_unit_vectors(already_existing_points),n,R,r_thresh)
+	return sample_in_sector(theta_0_real,theta_1_real,n,check,rng,retries,max_failures)
+
+#Same placement as uniform_in_sector_batch, but the overlap check only looks at the neighbouring cells of a SphereCellIndex that holds all points placed so far. Accepted
+#points are added to the index, so it can be passed on to the next ring section of the same knob.
+def uniform_in_sector_indexed(theta_0_real,theta_1_real,n,R,r_thresh,index,rng,retries=100,max_failures=100):
+	return sample_in_sector(theta_0_real,theta_1_real,n,index,rng,retries,max_failures)
+
+#returns a placement function with the signature of uniform_in_sector that keeps the points of one knob in a persistent SphereCellIndex. The argument
+#already_existing_points is not used, since the index already holds every point placed with this function.
+def indexed_placement(R,r_thresh):
+	index=SphereCellIndex(R,2*r_thresh)
+	def place(theta_0_real,theta_1_real,n,R,r_thresh,already_existing_points,rng):
+		return uniform_in_sector_indexed(theta_0_real,theta_1_real,n,R,r_thresh,index,rng)
+	return place
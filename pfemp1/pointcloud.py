@@ -0,0 +1,97 @@
+##############################################################################################################################################################################
+# Point clouds on the half-sphere for visualisation (see distribution-on-half-sphere.py): particles are distributed over circular ring sections along the arclength
+# according to given fractions and uniformly (in area) within each ring. There is no overlap check, so all points are drawn at once.
+# Note definition of the angles (as in distribution-on-half-sphere.py): theta is the azimuthal angle (0 to 2 pi) and phi is the polar angle which is 0 along the
+# z-axis. The rings are bounded by the polar angles phis.
+# Large clouds (many knobs) are written chunk by chunk to an .npy or a binary PLY file, so the memory needed does not grow with the number of points.
+##############################################################################################################################################################################
+
+import os
+
+import numpy as np
+
+chunk_size=1000000 #points per chunk when streaming to a file
+
+#ring index of n particles, drawn by inverse transform sampling from the cumulative distribution of the fractions
+def sample_rings(n,fractions,rng):
+	cdf=np.cumsum(fractions,dtype=float)
+	cdf/=cdf[-1]
+	return np.minimum(np.searchsorted(cdf,rng.random(n),side='right'),len(cdf)-1)
+
+#one point for each entry of rings, uniformly distributed in the ring sections on the half-sphere of radius R; returns the coordinates with shape (n,3)
+def points_in_rings(rings,R,phis,rng):
+	x=(1.0-np.cos(np.asarray(phis,dtype=float)))/2.0
+	x_0=x[rings]
+	x_1=x[np.asarray(rings)+1]
+	theta=2*np.pi*rng.random(len(x_0))
+	phi=np.arccos(1.0-2.0*(x_0+rng.random(len(x_0))*(x_1-x_0)))
+	points=np.empty((len(x_0),3))
+	points[:,0]=R*np.sin(phi)*np.cos(theta)
+	points[:,1]=R*np.sin(phi)*np.sin(theta)
+	points[:,2]=R*np.cos(phi)
+	return points
+
+#n points whose rings are drawn from the fractions
+def sample_points(n,fractions,R,phis,rng):
+	return points_in_rings(sample_rings(n,fractions,rng),R,phis,rng)
+
+class PointCloudWriter:
+
+	#writes count points (float32 x,y,z) to path; the format is taken from the extension (.npy or .ply). With the PLY format every point also gets the index of its
+	#knob, which is useful to colour the knobs in a viewer.
+	def __init__(self,path,count):
+		self.format=os.path.splitext(path)[1].lower()
+		self.count=count
+		self.written=0
+		if self.format=='.npy':
+			self.array=np.lib.format.open_memmap(path,mode='w+',dtype=np.float32,shape=(count,3))
+		elif self.format=='.ply':
+			self.file=open(path,'wb')
+			header=['ply','format binary_little_endian 1.0','element vertex %d' % count,'property float x','property float y','property float z','property uint knob','end_header']
+			self.file.write(('\n'.join(header)+'\n').encode('ascii'))
+		else:
+			raise ValueError("unknown point cloud format: %s (use .npy or .ply)" % path)
+
+	#append a block of points with shape (n,3) that belong to the given knobs (scalar or one index per point)
+	def write(self,points,knobs=0):
+		n=len(points)
+		if self.written+n>self.count:
+			raise ValueError("more than %d points written" % self.count)
+		if self.format=='.npy':
+			self.array[self.written:self.written+n]=points
+		else:
+			vertices=np.empty(n,dtype=[('x','<f4'),('y','<f4'),('z','<f4'),('knob','<u4')])
+			vertices['x']=points[:,0]
+			vertices['y']=points[:,1]
+			vertices['z']=points[:,2]
+			vertices['knob']=knobs
+			self.file.write(vertices.tobytes())
+		self.written+=n
+
+	def close(self):
+		if self.written!=self.count:
+			raise ValueError("%d of %d points written" % (self.written,self.count))
+		if self.format=='.npy':
+			self.array.flush()
+			del self.array
+		else:
+			self.file.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self,*exc):
+		if exc[0] is None:
+			self.close()
+		elif self.format=='.ply':
+			self.file.close()
+
+#stream the point clouds of K knobs with N particles each to an .npy or .ply file; the rings of the particles are drawn independently from the fractions
+def write_point_cloud(path,K,N,fractions,R,phis,rng=None,size=chunk_size):
+	if rng is None:
+		rng=np.random.default_rng()
+	knobs_per_chunk=max(1,size//N)
+	with PointCloudWriter(path,K*N) as writer:
+		for first in range(0,K,knobs_per_chunk):
+			knobs=min(knobs_per_chunk,K-first)
+			writer.write(sample_points(knobs*N,fractions,R,phis,rng),np.repeat(np.arange(first,first+knobs),N))
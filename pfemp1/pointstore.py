@@ -0,0 +1,44 @@
+##############################################################################################################################################################################
+# Preallocated storage of the molecules of one knob. The angles (2 x capacity, layout of uniform_in_sector) and the unit vectors (capacity x 3) are filled in place
+# ring section by ring section; angles() and units() return views of the filled part, so the placement of the next ring section and the nearest neighbor stage read
+# the points without copying them. There are no empty slots in the views, so no sentinel value is needed.
+# Note definition of theta and phi (as in knob.py): theta is the polar angle which is 0 when pointing along the x-axis and pi/2 along the z-axis.
+##############################################################################################################################################################################
+
+import numpy as np
+
+class PointStore:
+
+	def __init__(self,capacity):
+		self.capacity=capacity
+		self.angle_array=np.empty((2,capacity))
+		self.unit_array=np.empty((capacity,3))
+		self.size=0
+
+	def __len__(self):
+		return self.size
+
+	#append the points of a 2 x n angle array (e.g. the result of uniform_in_sector), the unit vectors are computed into their slots
+	def append(self,angles):
+		angles=np.asarray(angles,dtype=float).reshape(2,-1)
+		n=angles.shape[1]
+		if self.size+n>self.capacity:
+			raise ValueError("more than %d points stored" % self.capacity)
+		block=slice(self.size,self.size+n)
+		self.angle_array[:,block]=angles
+		c=np.cos(angles[0])
+		units=self.unit_array[block]
+		np.multiply(c,np.cos(angles[1]),out=units[:,0])
+		np.multiply(c,np.sin(angles[1]),out=units[:,1])
+		np.sin(angles[0],out=units[:,2])
+		self.size+=n
+
+	#views of the stored angles (2 x size) and unit vectors (size x 3)
+	def angles(self):
+		return self.angle_array[:,:self.size]
+
+	def units(self):
+		return self.unit_array[:self.size]
+
+	def clear(self):
+		self.size=0
@@ -0,0 +1,112 @@
+##############################################################################################################################################################################
+# Conversion behind density-in-sectors.py: this module converts a distribution of particles (on a half-sphere) recorded in x-slices to a distribution in discrete bins along the arclength on the half-sphere.
+# To do so, the area patches formed by x and phi cuts through the half sphere are computed numerically for any number of slices (pfemp1/areas.py, cached on disk)
+# and the conversion is one triangular solve (pfemp1/conversion.py).
+# The array "fraction_phi" determines the percentage of particles that would lie within each arclength-bin according to the calculated distribution.
+# main() prints the fractions of the measured AA and AS distributions and shows the densities; matplotlib is only imported for the plot.
+##############################################################################################################################################################################
+
+import numpy as np
+
+from pfemp1.conversion import slice_areas, density_in_rings, ring_fractions, bootstrap_fractions
+
+count_AA=[98,91,73,66,36,0,0]
+count_AS=[57,54,55,44,27,14,11]
+
+N_AA=sum(count_AA)
+N_AS=sum(count_AS)
+
+R_AA=79.206/2.0
+R_AS=108.289/2.0
+r_AA=27.2
+r_AS=32.2
+
+#number of x-slices (and arclength rings) of the two knob types
+n_AA=5
+n_AS=7
+
+#resampled count vectors for the confidence bands of fraction_phi (pfemp1/conversion.py), the seed makes the bands reproducible
+bootstrap_draws=20000
+bootstrap_seed=20180704
+
+#density in the x-slices for the counts of a knob of radius R cut into n slices; each x-slice has the same surface area
+def density_in_slices(count,n,R):
+	slice_area=slice_areas(n,R)[0]
+	return [i/slice_area for i in count]
+
+#conversion from the discrete density in the first n x-slices to the discrete density in n arclength rings (phi sections) on the half-sphere of radius R with N particles
+def density_spherical_coordinates(density_x,n,R,N):
+	density_phi=density_in_rings(density_x[:n],R)
+
+	arc_lengths=[R*np.arcsin((a+1)/float(n)) for a in range(n)]
+	d=[i/N*1000 for i in density_phi]
+
+	#Calulate fraction of particles in each phi-section
+	fraction_phi=ring_fractions(density_phi,R,N).tolist()
+	print(fraction_phi)
+
+	#95% confidence band of each fraction from multinomial resampling of the counts in the x-slices
+	counts=np.asarray(density_x[:n])*slice_areas(n,R)
+	lower,upper,negative=bootstrap_fractions(counts,R,bootstrap_draws,rng=np.random.default_rng(bootstrap_seed))
+	for i in range(n):
+		print("ring %d: %.4f [%.4f, %.4f]" % (i+1,fraction_phi[i],lower[i],upper[i]))
+	if min(density_phi)<0:
+		print("warning: the measured counts give a negative density")
+	print("%.1f%% of the resampled counts give a negative density in some ring" % (100.0*negative.mean()))
+
+	#make data easily plotable 
+	ph_plot=[0,0]
+	dph_plot=[0]
+	for i in range(n):
+		ph_plot.append(arc_lengths[i])
+		ph_plot.append(arc_lengths[i])
+		dph_plot.append(d[i])
+		dph_plot.append(d[i])
+	dph_plot.append(0)
+	return [ph_plot,dph_plot]
+
+def density_spherical_coordinates_AA(density_x):
+	return density_spherical_coordinates(density_x,n_AA,R_AA,N_AA)
+
+def density_spherical_coordinates_AS(density_x):
+	return density_spherical_coordinates(density_x,n_AS,R_AS,N_AS)
+
+#print the fractions of the AA and AS knob in the arclength rings and plot their densities (plot=True)
+def main(plot=True):
+	density_x_AA=density_in_slices(count_AA,n_AA,R_AA)
+	density_x_AS=density_in_slices(count_AS,n_AS,R_AS)
+	[ph_plot_AA,dph_plot_AA]=density_spherical_coordinates_AA(density_x_AA)
+	[ph_plot_AS,dph_plot_AS]=density_spherical_coordinates_AS(density_x_AS)
+	if plot:
+		plot_densities(ph_plot_AA,dph_plot_AA,ph_plot_AS,dph_plot_AS,density_x_AA,density_x_AS)
+
+#plot of the densities in the arclength rings as returned by density_spherical_coordinates (the densities in the x-slices are used by the histogram that is commented
+#out)
+def plot_densities(ph_plot_AA,dph_plot_AA,ph_plot_AS,dph_plot_AS,density_x_AA,density_x_AS):
+	import matplotlib.pyplot as plt
+
+	#Plot density in discrete phi bins as function of arclength on the sphere
+	plt.plot(ph_plot_AA,dph_plot_AA,label="AA",color="blue")
+	plt.plot(ph_plot_AS,dph_plot_AS,label="AS",color="orange")
+	plt.axvline(R_AA*np.arcsin(r_AA/R_AA), linestyle='--',color="blue")
+	plt.axvline(R_AS*np.arcsin(r_AS/R_AS), linestyle='--',color="orange")
+	plt.xlabel("arc length (nm)", fontsize='14')
+	plt.ylabel("normalized density of PfEMP1s", fontsize='14')
+	plt.legend()
+	plt.tight_layout()
+	plt.show()
+
+	#Plot histogram of counts in x-sections
+	'''
+	bar_width=0.35
+	d_x_AA=[i for i in density_x_AA]
+	plt.bar([i+1 for i in np.arange(len(density_x_AA))],d_x_AA,bar_width,label="AA")
+	d_x_AS=[i for i in density_x_AS]
+	plt.bar([i+1+ bar_width for i in np.arange(len(density_x_AS))],d_x_AS,bar_width,label="AS")
+	plt.xlabel("x-slice", fontsize='14')
+	plt.xticks( [i+1+bar_width/2.0 for i in np.arange(len(density_x_AS))], [i+1 for i in np.arange(len(density_x_AS))])
+	plt.ylabel("# of PfEMP1s counted", fontsize='14')
+	plt.legend()
+	plt.tight_layout()
+	plt.show()
+	'''
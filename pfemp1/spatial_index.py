@@ -0,0 +1,74 @@
+##############################################################################################################################################################################
+# Spatial cell index for the overlap check during molecule placement.
+# Unit vectors are hashed into cubic cells whose edge is the chord length belonging to the minimal distance, so a new point only has to be compared to the points in the
+# 27 cells around it instead of to all points of the knob. Every point is stored in all 27 cells around its own cell, which makes a query a single dictionary lookup.
+# Because distance() in knob.py folds angles above pi/2 (see geometry.overlap_cos), points close to the antipode of a candidate count as overlapping as well
+# and the cell of the antipode is looked up, too.
+##############################################################################################################################################################################
+
+import itertools
+
+import numpy as np
+
+from pfemp1.geometry import overlap_cos
+
+OFFSETS=list(itertools.product((-1,0,1),repeat=3))
+EMPTY=[]
+
+class SphereCellIndex:
+
+	#R is the radius of the sphere and d_min the minimal allowed distance on the surface (2*r_thresh for discs of radius r_thresh)
+	def __init__(self,R,d_min,capacity=64):
+		self.limit=overlap_cos(R,d_min)
+		a=min(d_min/float(R),np.pi/2.0)
+		self.cell=max(2.0*np.sin(a/2.0),1e-6)
+		#cells are numbered by a single integer code, the shift keeps all cell coordinates of the unit sphere (and their neighbours) positive
+		self.shift=int(np.ceil(1.0/self.cell))+1
+		self.width=2*self.shift+2
+		self.neighbour_codes=[(o[0]*self.width+o[1])*self.width+o[2] for o in OFFSETS]
+		self.vectors=np.empty((capacity,3))
+		self.size=0
+		self.cells={}
+
+	def __len__(self):
+		return self.size
+
+	#cell codes of an array of unit vectors with shape (k,3)
+	def codes(self,us):
+		k=np.floor(us/self.cell).astype(np.int64)+self.shift
+		return (k[:,0]*self.width+k[:,1])*self.width+k[:,2]
+
+	#boolean mask that is True for every row of us (unit vectors, shape (k,3)) that keeps the minimal distance to all stored points
+	def free_mask(self,us):
+		us=np.asarray(us,dtype=float).reshape(-1,3)
+		if self.limit<=-1.0:
+			return np.full(len(us),self.size==0)
+		get=self.cells.get
+		found=[get(a,EMPTY)+get(b,EMPTY) for a,b in zip(self.codes(us).tolist(),self.codes(-us).tolist())]
+		lengths=np.fromiter(map(len,found),dtype=np.int64,count=len(found))
+		free=np.ones(len(us),dtype=bool)
+		if lengths.sum()==0:
+			return free
+		stored=np.fromiter(itertools.chain.from_iterable(found),dtype=np.int64)
+		owner=np.repeat(np.arange(len(us)),lengths)
+		overlap=np.abs(np.einsum('ij,ij->i',self.vectors[stored],us[owner]))>self.limit
+		free[owner[overlap]]=False
+		return free
+
+	#True if the unit vector u keeps the minimal distance to all stored points
+	def is_free(self,u):
+		return bool(self.free_mask(u)[0])
+
+	#store accepted unit vectors (shape (k,3) or a single vector), the index is updated incrementally
+	def add(self,us):
+		us=np.asarray(us,dtype=float).reshape(-1,3)
+		if self.size+len(us)>len(self.vectors):
+			grown=np.empty((max(2*len(self.vectors),self.size+len(us)),3))
+			grown[:self.size]=self.vectors[:self.size]
+			self.vectors=grown
+		self.vectors[self.size:self.size+len(us)]=us
+		#every point is registered in its own cell and in the 26 cells around it
+		for code in self.codes(us).tolist():
+			for delta in self.neighbour_codes:
+				self.cells.setdefault(code+delta,[]).append(self.size)
+			self.size+=1
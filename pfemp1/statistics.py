@@ -0,0 +1,120 @@
+##############################################################################################################################################################################
+# Streaming statistics of nearest neighbor distances.
+# Values are fed in blocks (e.g. the distances of one replicate or one chunk of replicates) and only summaries are kept: count, running mean and variance (merged with
+# the formula of Chan et al., which is exact for any block size), a histogram with fixed bins for plotting and a fine histogram over the same range that serves as
+# quantile sketch. The memory needed does not grow with the number of values.
+##############################################################################################################################################################################
+
+import numpy as np
+
+#merge the running moments (number of values, mean, sum of squared deviations) of two blocks
+def merge_moments(n_a,mean_a,m2_a,n_b,mean_b,m2_b):
+	total=n_a+n_b
+	delta=mean_b-mean_a
+	return total,mean_a+delta*n_b/total,m2_a+m2_b+delta*delta*n_a*n_b/total
+
+#merge the moments of replicate means m_k with weights w_k (the number of values of a replicate) of two blocks: sum of the weights, sum of the squared weights,
+#weighted mean mu, sum of w_k^2 (m_k-mu) and sum of w_k^2 (m_k-mu)^2
+def merge_weighted_moments(w_a,w2_a,mean_a,p_a,q_a,w_b,w2_b,mean_b,p_b,q_b):
+	w=w_a+w_b
+	mean=mean_a+(mean_b-mean_a)*w_b/w
+	d_a=mean_a-mean
+	d_b=mean_b-mean
+	return w,w2_a+w2_b,mean,p_a+w2_a*d_a+p_b+w2_b*d_b,q_a+2*d_a*p_a+w2_a*d_a*d_a+q_b+2*d_b*p_b+w2_b*d_b*d_b
+
+class StreamingStatistics:
+
+	#edges are the fixed bin edges of the histogram, the quantile sketch uses sketch_bins bins between the first and the last edge.
+	#If replicate_size is given, every replicate (knob) contributes that many consecutive values and the moments of the replicate means, weighted with the number of
+	#values of the replicate, are kept as well; they give the standard error of the mean, since the distances within one knob are not independent.
+	def __init__(self,edges,sketch_bins=4096,replicate_size=None):
+		self.edges=np.asarray(edges,dtype=float)
+		self.sketch_edges=np.linspace(self.edges[0],self.edges[-1],sketch_bins+1)
+		self.replicate_size=replicate_size
+		self.count=0
+		self.mean=0.0
+		self.m2=0.0
+		self.replicates=0
+		self.replicate_weight=0
+		self.replicate_weight2=0
+		self.replicate_mean=0.0
+		self.replicate_p=0.0
+		self.replicate_m2=0.0
+		self.minimum=np.inf
+		self.maximum=-np.inf
+		self.histogram=np.zeros(len(self.edges)-1,dtype=np.int64)
+		self.sketch=np.zeros(sketch_bins+2,dtype=np.int64) #first and last entry count values below and above the range
+
+	#add a block of values; replicate_size overrides the one of the constructor for this block (e.g. for knobs with different numbers of molecules)
+	def add(self,values,replicate_size=None):
+		values=np.asarray(values,dtype=float).ravel()
+		n=len(values)
+		if n==0:
+			return
+		mean=values.mean()
+		m2=np.sum(np.power(values-mean,2))
+		self.count,self.mean,self.m2=merge_moments(self.count,self.mean,self.m2,n,mean,m2)
+		if replicate_size is None:
+			replicate_size=self.replicate_size
+		if replicate_size is not None:
+			means=values.reshape(-1,replicate_size).mean(axis=1)
+			mean=means.mean()
+			q=replicate_size**2*np.sum(np.power(means-mean,2))
+			self.replicates+=len(means)
+			self.replicate_weight,self.replicate_weight2,self.replicate_mean,self.replicate_p,self.replicate_m2=merge_weighted_moments(self.replicate_weight,
+				self.replicate_weight2,self.replicate_mean,self.replicate_p,self.replicate_m2,n,len(means)*replicate_size**2,mean,0.0,q)
+		self.minimum=min(self.minimum,values.min())
+		self.maximum=max(self.maximum,values.max())
+		self.histogram+=np.histogram(values,self.edges)[0]
+		self.sketch+=np.bincount(np.searchsorted(self.sketch_edges,values,side='right'),minlength=len(self.sketch))[:len(self.sketch)]
+
+	#merge another StreamingStatistics with the same bins, e.g. from another worker
+	def merge(self,other):
+		if other.count==0:
+			return
+		self.count,self.mean,self.m2=merge_moments(self.count,self.mean,self.m2,other.count,other.mean,other.m2)
+		if other.replicates:
+			self.replicates+=other.replicates
+			self.replicate_weight,self.replicate_weight2,self.replicate_mean,self.replicate_p,self.replicate_m2=merge_weighted_moments(self.replicate_weight,
+				self.replicate_weight2,self.replicate_mean,self.replicate_p,self.replicate_m2,other.replicate_weight,other.replicate_weight2,other.replicate_mean,
+				other.replicate_p,other.replicate_m2)
+		self.minimum=min(self.minimum,other.minimum)
+		self.maximum=max(self.maximum,other.maximum)
+		self.histogram+=other.histogram
+		self.sketch+=other.sketch
+
+	#variance and standard deviation of all values (ddof=0 like np.var and np.std)
+	def var(self):
+		return self.m2/self.count
+
+	def std(self):
+		return np.sqrt(self.var())
+
+	#standard error of the mean from the spread of the replicate means (or of the single values, if no replicate size was given), using the number of samples
+	#that were actually added. The mean of all values is the mean of the replicate means weighted with their sizes (a ratio estimator), its standard error is
+	#sqrt(K/(K-1) sum w_k^2 (m_k-mean)^2)/sum w_k for K replicates; for replicates of equal size this is the standard error of the unweighted replicate means.
+	def sem(self):
+		if self.replicate_size is None and self.replicates==0:
+			return np.sqrt(self.m2/(self.count-1)/self.count) if self.count>1 else np.inf
+		if self.replicates<2:
+			return np.inf
+		return np.sqrt(self.replicates/(self.replicates-1.0)*self.replicate_m2)/self.replicate_weight
+
+	#q-quantile (0<=q<=1) from the sketch, linearly interpolated within a sketch bin. The error is at most one sketch bin width, values outside the range are
+	#represented by the minimum and maximum
+	def quantile(self,q):
+		target=q*self.count
+		cumulative=np.cumsum(self.sketch)
+		i=int(np.searchsorted(cumulative,target,side='left'))
+		if i==0:
+			return self.minimum
+		if i==len(self.sketch)-1:
+			return self.maximum
+		below=cumulative[i-1]
+		fraction=(target-below)/self.sketch[i] if self.sketch[i]>0 else 0.0
+		lo=self.sketch_edges[i-1]
+		hi=self.sketch_edges[i]
+		return min(max(lo+fraction*(hi-lo),self.minimum),self.maximum)
+
+	def centers(self):
+		return 0.5*(self.edges[1:]+self.edges[:-1])
@@ -0,0 +1,140 @@
+##############################################################################################################################################################################
+# Compact binary storage of nearest neighbor distance samples.
+# A file is a sequence of records, one per run (e.g. geometry, molecule count and r_thresh). Every record starts with a fixed part (magic, format version, length of the
+# metadata, number of values), followed by the metadata as JSON (including the dtype and the seed) and the raw float32/float64 values. The number of values is patched
+# when a record is finished, so values can be appended block by block; a record that was not finished (e.g. after a crash) extends to the end of the file.
+# The reader memory-maps the values of a record instead of parsing them. Summary tables (one row of statistics per run) are written as CSV with write_table().
+##############################################################################################################################################################################
+
+import csv
+import json
+import os
+import struct
+
+import numpy as np
+
+MAGIC=b'PFNN'
+VERSION=1
+FIXED=struct.Struct('<4sHIQ') #magic, version, length of the metadata, number of values
+UNFINISHED=2**64-1
+
+class DistanceWriter:
+
+	#values are stored with the given dtype (float64 or float32). With append=True records are appended to an existing file, otherwise the file is overwritten.
+	def __init__(self,path,dtype=np.float64,append=True):
+		self.dtype=np.dtype(dtype).newbyteorder('<')
+		self.file=open(path,'r+b' if append and os.path.exists(path) else 'w+b')
+		self.start=None
+		self.count=0
+
+	#start a new record, the keyword arguments are stored as metadata (e.g. geometry='AA', molecules=3, r_thresh=5.9, seed=...)
+	def begin(self,**metadata):
+		if self.start is not None:
+			self.end()
+		metadata=dict(metadata,dtype=self.dtype.str)
+		header=json.dumps(metadata,sort_keys=True).encode('utf-8')
+		self.file.seek(0,2)
+		self.start=self.file.tell()
+		self.file.write(FIXED.pack(MAGIC,VERSION,len(header),UNFINISHED))
+		self.file.write(header)
+		self.count=0
+
+	#append a block of values to the current record
+	def write(self,values):
+		values=np.asarray(values,dtype=self.dtype).ravel()
+		self.file.write(values.tobytes())
+		self.count+=len(values)
+
+	#finish the current record by writing the number of values into its fixed part
+	def end(self):
+		end=self.file.tell()
+		self.file.seek(self.start+FIXED.size-8)
+		self.file.write(struct.pack('<Q',self.count))
+		self.file.seek(end)
+		self.file.flush()
+		self.start=None
+
+	#current state of the writer: start of the open record (None if there is none), number of values in it and end of the file. Everything up to the end of the
+	#file is flushed to disk.
+	def position(self):
+		self.file.flush()
+		os.fsync(self.file.fileno())
+		return self.start,self.count,self.file.tell()
+
+	#continue from a state returned by position(): data written after it is discarded and an open record is continued
+	def resume(self,start,count,end):
+		self.file.truncate(end)
+		self.file.seek(end)
+		self.start=start
+		self.count=count
+
+	def close(self):
+		if self.start is not None:
+			self.end()
+		self.file.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self,*exc):
+		self.close()
+
+class DistanceFile:
+
+	#scan the record headers of a file written by DistanceWriter, the values themselves are not read
+	def __init__(self,path):
+		self.path=path
+		self.records=[]
+		with open(path,'rb') as f:
+			f.seek(0,2)
+			size=f.tell()
+			position=0
+			while position+FIXED.size<=size:
+				f.seek(position)
+				magic,version,header_length,count=FIXED.unpack(f.read(FIXED.size))
+				if magic!=MAGIC:
+					raise ValueError("%s: no distance record at byte %d" % (path,position))
+				metadata=json.loads(f.read(header_length).decode('utf-8'))
+				dtype=np.dtype(metadata['dtype'])
+				offset=position+FIXED.size+header_length
+				if count==UNFINISHED:
+					count=(size-offset)//dtype.itemsize
+				self.records.append((metadata,offset,count))
+				position=offset+count*dtype.itemsize
+
+	#metadata of all records
+	def metadata(self):
+		return [m for m,_,_ in self.records]
+
+	#indices of the records whose metadata match all given keyword arguments
+	def find(self,**selection):
+		return [i for i,(m,_,_) in enumerate(self.records) if all(m.get(k)==v for k,v in selection.items())]
+
+	#memory-mapped (read only) values of record i
+	def values(self,i):
+		metadata,offset,count=self.records[i]
+		if count==0:
+			return np.zeros(0,dtype=np.dtype(metadata['dtype']))
+		return np.memmap(self.path,dtype=np.dtype(metadata['dtype']),mode='r',offset=offset,shape=(count,))
+
+	#values of the first record that matches the selection
+	def get(self,**selection):
+		found=self.find(**selection)
+		if not found:
+			raise KeyError(selection)
+		return self.values(found[0])
+
+#convert a text file of the old format (space separated values, one line per run) into the binary format. metadata is a list with one dict per line.
+def convert_text_file(text_path,binary_path,metadata,dtype=np.float64):
+	with open(text_path) as f, DistanceWriter(binary_path,dtype,append=False) as writer:
+		for line,m in zip(f,metadata):
+			writer.begin(**m)
+			writer.write(np.fromstring(line,sep=' '))
+			writer.end()
+
+#write rows (dicts) with the given columns as CSV table, e.g. the results of pfemp1/sweep.py or pfemp1/erythrocyte.py
+def write_table(path,columns,rows):
+	with open(path,'w',newline='') as f:
+		writer=csv.DictWriter(f,columns)
+		writer.writeheader()
+		writer.writerows(rows)
@@ -0,0 +1,110 @@
+##############################################################################################################################################################################
+# Parameter sweep over knob geometry (AA, AS or a custom radius and section table), footprint area of the molecules and molecule count.
+# Every point of the grid is a job of N knobs that is simulated with the ensemble engine in chunks, like routine_AA. The chunks of all jobs are run on one process
+# pool, the most expensive jobs first (the cost grows with the number of knobs, the square of the molecule count and the coverage of the knob), so the long jobs do
+# not end up alone at the end of the sweep. The section bounds of a geometry are computed once and shared by all its jobs. Every job has its own random stream that
+# only depends on the seed, the geometry, the area and the molecule count, so the results do not depend on the grid, the order or the number of workers.
+# The result is one table with a row per job (storage.write_table() writes it as CSV).
+##############################################################################################################################################################################
+
+import collections
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from pfemp1.knob import Geometry, custom_geometry, geometries, seed, workers
+from pfemp1.ensemble import ensemble_distances
+from pfemp1.parallel import run_chunk, replicate_chunks, seed_for
+from pfemp1.statistics import StreamingStatistics
+from pfemp1.storage import write_table
+
+columns=('geometry','R','area','r_thresh','molecules','replicates','coverage','mean','std','sem','q05','median','q95','minimum','maximum')
+
+#radius of a disc with the given footprint area (nm^2); the default area 110 nm^2 gives r_var
+def footprint_radius(area):
+	return np.sqrt(area/np.pi)
+
+class Job:
+
+	def __init__(self,geometry,area,molecules,replicates):
+		self.geometry=geometry
+		self.area=float(area)
+		self.molecules=int(molecules)
+		self.replicates=int(replicates)
+		self.r_thresh=footprint_radius(self.area)
+
+	#fraction of the knob surface covered by the footprints
+	def coverage(self):
+		return self.molecules*self.area/self.geometry.area()
+
+	#relative cost: every molecule is checked against the ones placed before, and retries become frequent when the knob fills up
+	def cost(self):
+		return self.replicates*self.molecules**2/max(1.0-self.coverage(),0.1)
+
+	#random stream of the job, independent of the other jobs of the grid
+	def seed(self,seed):
+		label=zlib.crc32(("%s %r" % (self.geometry.name,self.area)).encode('utf-8'))
+		return seed_for(seed,self.molecules,label)
+
+	#fixed histogram bins from full overlap to the largest surface to surface distance, like histogram_edges of average_distance.py
+	def edges(self):
+		return np.linspace(-2*self.r_thresh,self.geometry.R*np.pi/2.0-2*self.r_thresh,51)
+
+	def row(self,statistics):
+		return {'geometry':self.geometry.name,'R':self.geometry.R,'area':self.area,'r_thresh':self.r_thresh,'molecules':self.molecules,'replicates':statistics.replicates,
+			'coverage':self.coverage(),'mean':statistics.mean,'std':statistics.std(),'sem':statistics.sem(),'q05':statistics.quantile(0.05),
+			'median':statistics.quantile(0.5),'q95':statistics.quantile(0.95),'minimum':statistics.minimum,'maximum':statistics.maximum}
+
+#nearest neighbor distances (surface to surface) of K knobs of the geometry, shape (K,molecules); signature for run_chunk with ensemble=True
+def simulate(K,molecules,r_thresh,geometry,rng=None):
+	return ensemble_distances(K,molecules,r_thresh,geometry.R,geometry.thetas,geometry.distribution,rng,geometry.name,geometry.bounds)
+
+#jobs of the full grid; selection holds names of the predefined geometries or Geometry objects
+def grid(selection,areas,molecule_counts,replicates):
+	selected=[geometries[g] if isinstance(g,str) else g for g in selection]
+	return [Job(g,area,molecules,replicates) for g in selected for area in areas for molecules in molecule_counts]
+
+#run the jobs (on the pool, if given) and return their statistics in the order of the jobs. The chunks are submitted in the order of decreasing job cost, at most
+#window at a time, and added to the statistics of their job in the order of submission.
+def run(jobs,seed=seed,pool=None,window=64):
+	order=sorted(range(len(jobs)),key=lambda i:-jobs[i].cost())
+	tasks=[]
+	for i in order:
+		job=jobs[i]
+		chunks=replicate_chunks(job.replicates)
+		for replicates,s in zip(chunks,job.seed(seed).spawn(len(chunks))):
+			tasks.append((i,(simulate,replicates,(job.molecules,job.r_thresh,job.geometry),s,True)))
+	statistics=[StreamingStatistics(job.edges(),replicate_size=job.molecules) for job in jobs]
+	if pool is None:
+		for i,task in tasks:
+			statistics[i].add(run_chunk(*task))
+		return statistics
+	pending=collections.deque()
+	try:
+		for i,task in tasks:
+			pending.append((i,pool.submit(run_chunk,*task)))
+			if len(pending)>=window:
+				i,future=pending.popleft()
+				statistics[i].add(future.result())
+		while pending:
+			i,future=pending.popleft()
+			statistics[i].add(future.result())
+	finally:
+		for i,future in pending:
+			future.cancel()
+	return statistics
+
+#one row per job with the columns above
+def table(jobs,statistics):
+	return [job.row(s) for job,s in zip(jobs,statistics)]
+
+#default sweep: AA and AS knob, footprints from half to twice the 110 nm^2 of r_var and 2 to 10 molecules, written to sweep_results.csv
+def main(selection=('AA','AS'),areas=(55.0,110.0,220.0),molecule_counts=range(2,11),replicates=20000,path="sweep_results.csv"):
+	jobs=grid(selection,areas,molecule_counts,replicates)
+	with ProcessPoolExecutor(workers) as pool:
+		rows=table(jobs,run(jobs,pool=pool))
+	write_table(path,columns,rows)
+	for row in rows:
+		print("%s area %.0f nm^2, %d molecules: mean %.4f nm, standard error %.4f nm" % (row['geometry'],row['area'],row['molecules'],row['mean'],row['sem']))
+	return rows